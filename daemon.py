@@ -0,0 +1,129 @@
+# Keeps the script resident instead of starting it from cron, so imports, authentication and the discovery document are only loaded once.
+# Every club is polled on its own schedule: often around its game days, rarely when it has no games coming up.
+# Changes to config.py are picked up without a restart, SIGHUP forces a reload and SIGTERM or Ctrl+C stop after the current sync.
+import importlib
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+import config
+import googleclient
+import notifications
+import script
+
+# How often config.py is checked for changes, in seconds
+CONFIGCHECKINTERVAL = 60
+
+stopRequested = threading.Event()
+reloadRequested = threading.Event()
+wakeUp = threading.Event()
+
+
+def main():
+    script.setupLogging()
+    instanceLock = script.acquireInstanceLock()
+    if instanceLock is None:
+        sys.exit(1)
+
+    installSignalHandlers()
+    logging.info(f"Daemon started with pid {os.getpid()}")
+
+    schedule = {}
+    configModified = getConfigModified()
+
+    while not stopRequested.is_set():
+        if reloadRequested.is_set() or getConfigModified() != configModified:
+            reloadRequested.clear()
+            configModified = getConfigModified()
+            reloadConfig()
+
+        clubs = script.PROBASKETCLUBS
+        dueClubs = [club for club in clubs if schedule.get(club['clubId'], 0) <= time.time()]
+        if dueClubs:
+            runSync(dueClubs)
+            for club in dueClubs:
+                interval = getPollInterval(club['clubId'])
+                schedule[club['clubId']] = time.time() + interval * 60
+                logging.info(f"Next poll for club {club['clubId']} in {interval} minutes")
+
+        # Clubs removed from the config are not polled anymore
+        schedule = {clubId: due for clubId, due in schedule.items() if any(club['clubId'] == clubId for club in clubs)}
+        nextPoll = min(schedule.values(), default=time.time())
+        wakeUp.wait(min(max(nextPoll - time.time(), 0), CONFIGCHECKINTERVAL))
+        wakeUp.clear()
+
+    logging.info("Daemon stopped")
+    instanceLock.close()
+
+def runSync(clubs):
+    try:
+        script.runSync(clubs)
+    except Exception as e:
+        # A failed sync must not end the daemon, the clubs are polled again on their next interval
+        logMessage = f"Sync failed for clubs {', '.join(club['clubId'] for club in clubs)}: {e}"
+        logging.exception(logMessage)
+        script.sendNotification(script.CLUBNAMESHORT + ": Gameplan Error", logMessage)
+
+def getPollInterval(clubId, now=None):
+    if now is None:
+        now = time.time()
+
+    # Games that just ended count as well, their results are entered afterwards
+    gameDates = script.loadClubGameDates(clubId)
+    distances = [abs(gameDate.timestamp() - now) / 86400 for gameDate in gameDates]
+    if not distances:
+        return script.POLLINTERVALOFFSEASON
+
+    nearestGame = min(distances)
+    for days, minutes in script.POLLINTERVALS:
+        if nearestGame <= days:
+            return minutes
+    return script.POLLINTERVALOFFSEASON
+
+def getConfigModified():
+    try:
+        return os.path.getmtime(config.__file__)
+    except OSError:
+        return None
+
+def reloadConfig():
+    try:
+        importlib.reload(config)
+        # The modules read their settings on import, reloading them also drops the cached service and sessions
+        # The script comes last, so it imports the functions of the reloaded modules
+        importlib.reload(notifications)
+        importlib.reload(googleclient)
+        importlib.reload(script)
+    except Exception as e:
+        logMessage = f"Unable to reload config, keeping the previous one: {e}"
+        logging.error(logMessage)
+        script.sendNotification(script.CLUBNAMESHORT + ": Gameplan Error", logMessage)
+        return
+
+    # The log path or level may have changed
+    logger = logging.getLogger()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    script.setupLogging()
+    logging.info("Config reloaded")
+
+def installSignalHandlers():
+    signal.signal(signal.SIGTERM, requestStop)
+    signal.signal(signal.SIGINT, requestStop)
+    if hasattr(signal, 'SIGHUP'):
+        signal.signal(signal.SIGHUP, requestReload)
+
+def requestStop(signum, frame):
+    stopRequested.set()
+    wakeUp.set()
+
+def requestReload(signum, frame):
+    reloadRequested.set()
+    wakeUp.set()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# Converts the dates between the Basketplan page, the game database and Google Calendar.
+# The German weekday names are a fixed table instead of the de_DE locale, so nothing global is changed and it is safe in threads.
+import datetime
+import re
+
+import pytz
+
+ZURICH = pytz.timezone('Europe/Zurich')
+WEEKDAYS = ('Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So')
+# format: Fr 01.07.24 20:00
+BASKETPLANDATE = re.compile(r'(?:(' + '|'.join(WEEKDAYS) + r')\.?\s+)?(\d{1,2})\.(\d{1,2})\.(\d{2})\s+(\d{1,2}):(\d{2})')
+
+
+def parseBasketplanDate(text):
+    text = text.strip()
+    if text == '':
+        return None
+
+    match = BASKETPLANDATE.fullmatch(text)
+    if match is None:
+        raise ValueError(f"time data {text!r} does not match format 'Fr 01.07.24 20:00'")
+
+    weekday, day, month, year, hour, minute = match.groups()
+    # Two digit years like strptime %y: 69-99 are 1969-1999, 00-68 are 2000-2068
+    year = int(year)
+    year += 1900 if year >= 69 else 2000
+
+    return ZURICH.localize(datetime.datetime(year, int(month), int(day), int(hour), int(minute)))
+
+def parseIsoDate(text):
+    # Reads the event dates of Google and the game dates of databases from before the epoch start times
+    # fromisoformat only knows the Z suffix from Python 3.11 on
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        # Anything unusual is left to the slow but lenient parser
+        from dateutil import parser
+        return parser.parse(text)
+
+def formatBasketplanDate(date):
+    # format: 01.07.24, the digits do not depend on the locale
+    return date.strftime('%d.%m.%y')
+
+def toEpoch(date):
+    # The game database stores the start times as UTC epoch seconds
+    return int(date.timestamp())
+
+def fromEpoch(seconds):
+    return datetime.datetime.fromtimestamp(seconds, ZURICH)
@@ -0,0 +1,290 @@
+# In-process stand-in for the Google Calendar API, used with CALENDARBACKEND = 'fake'.
+# It implements the calendars, calendarList, acl and events resources as well as batch requests and paging,
+# with a configurable latency per round trip and randomly injected errors, so sync runs work without network.
+import copy
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+import metrics
+
+# Errors that can be injected, the same ones Google answers when it is overloaded
+INJECTEDERRORS = [
+    (403, 'rateLimitExceeded'),
+    (429, 'rateLimitExceeded'),
+    (503, 'backendError'),
+]
+EVENTIDPATTERN = re.compile(r'^[a-v0-9]{5,1024}$')
+DEFAULTPAGESIZE = 250
+MAXPAGESIZE = 2500
+
+
+class FakeCalendarService:
+
+    def __init__(self, path=None, latency=0, errorRate=0, seed=None):
+        self.path = path
+        self.latency = latency
+        self.errorRate = errorRate
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.requestCount = 0
+        self.state = {'version': 0, 'syncEpoch': 0, 'calendars': {}}
+
+        if path is not None and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.state = json.load(file)
+
+    def calendars(self):
+        return FakeResource(self, {'insert': self.insertCalendar, 'delete': self.deleteCalendar, 'get': self.getCalendar})
+
+    def calendarList(self):
+        return FakeResource(self, {'list': self.listCalendars})
+
+    def acl(self):
+        return FakeResource(self, {'insert': self.insertAclRule, 'list': self.listAclRules})
+
+    def events(self):
+        return FakeResource(self, {
+            'list': self.listEvents,
+            'get': self.getEvent,
+            'insert': self.insertEvent,
+            'patch': self.patchEvent,
+            'delete': self.deleteEvent,
+        })
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatchRequest(self, callback)
+
+    def save(self):
+        if self.path is None:
+            return
+
+        with self.lock:
+            with open(self.path, 'w', encoding='utf-8') as file:
+                json.dump(self.state, file)
+
+    def expireSyncTokens(self):
+        # Every sync token handed out so far is answered with 410 Gone afterwards
+        with self.lock:
+            self.state['syncEpoch'] += 1
+
+    #region Transport
+
+    def roundTrip(self):
+        metrics.increment('http_requests', target='google')
+        with self.lock:
+            self.requestCount += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def injectError(self):
+        with self.lock:
+            if self.errorRate and self.random.random() < self.errorRate:
+                status, reason = self.random.choice(INJECTEDERRORS)
+                return createHttpError(status, reason, "Injected error")
+        return None
+
+    def call(self, method, params):
+        error = self.injectError()
+        if error is not None:
+            raise error
+
+        with self.lock:
+            return copy.deepcopy(method(**params))
+
+    #endregion
+
+    #region Calendars
+
+    def insertCalendar(self, body):
+        calendarId = f"{uuid.uuid4().hex}@group.calendar.google.com"
+        self.state['calendars'][calendarId] = {
+            'summary': body.get('summary'),
+            'timeZone': body.get('timeZone'),
+            'acl': [],
+            'events': {},
+        }
+        return self.createCalendarResource(calendarId)
+
+    def deleteCalendar(self, calendarId):
+        self.findCalendar(calendarId)
+        del self.state['calendars'][calendarId]
+        return ''
+
+    def getCalendar(self, calendarId):
+        self.findCalendar(calendarId)
+        return self.createCalendarResource(calendarId)
+
+    def listCalendars(self, pageToken=None, maxResults=100):
+        calendars = [self.createCalendarResource(calendarId) for calendarId in self.state['calendars']]
+        return createPage('calendar#calendarList', calendars, pageToken, maxResults)
+
+    def insertAclRule(self, calendarId, body):
+        calendar = self.findCalendar(calendarId)
+        rule = dict(body, id=f"{body['scope']['type']}:{body['scope'].get('value', '')}")
+        calendar['acl'].append(rule)
+        return rule
+
+    def listAclRules(self, calendarId, pageToken=None, maxResults=100):
+        return createPage('calendar#acl', self.findCalendar(calendarId)['acl'], pageToken, maxResults)
+
+    def findCalendar(self, calendarId):
+        if calendarId not in self.state['calendars']:
+            raise createHttpError(404, 'notFound', "Not Found")
+        return self.state['calendars'][calendarId]
+
+    def createCalendarResource(self, calendarId):
+        calendar = self.state['calendars'][calendarId]
+        return {'kind': 'calendar#calendar', 'id': calendarId, 'summary': calendar['summary'], 'timeZone': calendar['timeZone']}
+
+    #endregion
+
+    #region Events
+
+    def listEvents(self, calendarId, pageToken=None, maxResults=DEFAULTPAGESIZE, syncToken=None, singleEvents=False, **params):
+        calendar = self.findCalendar(calendarId)
+        maxResults = min(maxResults or DEFAULTPAGESIZE, MAXPAGESIZE)
+
+        if syncToken is not None:
+            syncVersion = self.parseSyncToken(syncToken)
+            if syncVersion is None:
+                raise createHttpError(410, 'fullSyncRequired', "Sync token is no longer valid, a full sync is required.")
+            # An incremental sync also returns deleted events as cancelled
+            events = [event for event in calendar['events'].values() if event['_version'] > syncVersion]
+        else:
+            events = [event for event in calendar['events'].values() if event['status'] != 'cancelled']
+
+        events = sorted(events, key=lambda event: event['_version'])
+        page = createPage('calendar#events', [stripEvent(event) for event in events], pageToken, maxResults)
+        if 'nextPageToken' not in page:
+            page['nextSyncToken'] = f"{self.state['syncEpoch']}-{self.state['version']}"
+        return page
+
+    def parseSyncToken(self, syncToken):
+        # Tokens of an earlier epoch have been expired
+        epoch, _, version = syncToken.partition('-')
+        if epoch != str(self.state['syncEpoch']) or not version.isdigit():
+            return None
+        return int(version)
+
+    def getEvent(self, calendarId, eventId):
+        return stripEvent(self.findEvent(calendarId, eventId))
+
+    def insertEvent(self, calendarId, body):
+        calendar = self.findCalendar(calendarId)
+        eventId = body.get('id') or uuid.uuid4().hex
+
+        if not EVENTIDPATTERN.match(eventId):
+            raise createHttpError(400, 'invalid', "Invalid resource id value.")
+        if eventId in calendar['events']:
+            raise createHttpError(409, 'duplicate', "The requested identifier already exists.")
+
+        event = dict(copy.deepcopy(body), id=eventId, status='confirmed')
+        calendar['events'][eventId] = self.touchEvent(event)
+        return stripEvent(event)
+
+    def patchEvent(self, calendarId, eventId, body):
+        event = self.findEvent(calendarId, eventId)
+        if event['status'] == 'cancelled':
+            raise createHttpError(404, 'notFound', "Not Found")
+
+        event.update(copy.deepcopy(body))
+        return stripEvent(self.touchEvent(event))
+
+    def deleteEvent(self, calendarId, eventId):
+        event = self.findEvent(calendarId, eventId)
+        if event['status'] == 'cancelled':
+            raise createHttpError(410, 'deleted', "Resource has been deleted")
+
+        event['status'] = 'cancelled'
+        self.touchEvent(event)
+        return ''
+
+    def findEvent(self, calendarId, eventId):
+        calendar = self.findCalendar(calendarId)
+        if eventId not in calendar['events']:
+            raise createHttpError(404, 'notFound', "Not Found")
+        return calendar['events'][eventId]
+
+    def touchEvent(self, event):
+        self.state['version'] += 1
+        event['_version'] = self.state['version']
+        return event
+
+    #endregion
+
+
+class FakeResource:
+
+    def __init__(self, service, methods):
+        self.service = service
+        self.methods = methods
+
+    def __getattr__(self, name):
+        if name not in self.methods:
+            raise AttributeError(name)
+        return lambda **params: FakeHttpRequest(self.service, self.methods[name], params)
+
+
+class FakeHttpRequest:
+
+    def __init__(self, service, method, params):
+        self.service = service
+        self.method = method
+        self.params = params
+
+    def execute(self, http=None, num_retries=0):
+        metrics.increment('google_api_calls')
+        self.service.roundTrip()
+        return self.service.call(self.method, self.params)
+
+
+class FakeBatchRequest:
+
+    def __init__(self, service, callback=None):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        if request_id is None:
+            request_id = str(len(self.requests) + 1)
+        self.requests.append((request_id, request, callback or self.callback))
+
+    def execute(self, http=None):
+        # The whole batch is one round trip, every request still fails on its own
+        self.service.roundTrip()
+        for request_id, request, callback in self.requests:
+            response = None
+            exception = None
+            try:
+                response = self.service.call(request.method, request.params)
+            except HttpError as error:
+                exception = error
+
+            if callback is not None:
+                callback(request_id, response, exception)
+
+
+def createHttpError(status, reason, message):
+    resp = httplib2.Response({'status': status})
+    resp.reason = message
+    content = {'error': {'code': status, 'message': message, 'errors': [{'reason': reason, 'message': message}]}}
+    return HttpError(resp, json.dumps(content).encode('utf-8'))
+
+def createPage(kind, items, pageToken, maxResults):
+    start = int(pageToken) if pageToken else 0
+    page = {'kind': kind, 'items': items[start:start + maxResults]}
+    if start + maxResults < len(items):
+        page['nextPageToken'] = str(start + maxResults)
+    return page
+
+def stripEvent(event):
+    return {key: value for key, value in event.items() if not key.startswith('_')}
@@ -0,0 +1,165 @@
+# Parses the game table of the Basketplan "showSearchGames.do" page into row dicts.
+# All backends return the same rows, they only differ in speed and memory usage.
+from html.parser import HTMLParser
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# Position of the used values in the cells of a game row
+COLUMNS = {
+    'date': 0,
+    'league': 3,
+    'id': 5,
+    'gym': 6,
+    'homeTeam': 7,
+    'awayTeam': 8,
+    'result': 11,
+}
+# The first two rows of the table are headers
+HEADERROWS = 2
+MINCELLS = max(COLUMNS.values()) + 1
+
+
+def parseGameRows(html, backend=None):
+    if backend is None:
+        backend = getDefaultBackend()
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parser backend: {backend}")
+
+    return BACKENDS[backend](html)
+
+def getDefaultBackend():
+    return 'lxml' if lxml is not None else 'stream'
+
+def getAvailableBackends():
+    return [backend for backend in BACKENDS if backend != 'lxml' or lxml is not None]
+
+def createRow(cells):
+    return {key: cells[index].strip() for key, index in COLUMNS.items()}
+
+def createRows(rows):
+    gameRows = []
+    for cells in rows[HEADERROWS:]:
+        # Rows like "no games found" do not have all the cells
+        if len(cells) < MINCELLS:
+            continue
+        gameRows.append(createRow(cells))
+
+    return gameRows
+
+#region Backends
+
+def parseWithBeautifulSoup(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.select_one('#body table.forms')
+    if table is None:
+        raise ValueError("Game table not found in response")
+
+    rows = [[cell.text for cell in row.find_all('td')] for row in table.find_all('tr')]
+    return createRows(rows)
+
+def parseWithLxml(html):
+    if lxml is None:
+        raise ValueError("Parser backend lxml is not installed")
+
+    root = lxml.html.fromstring(html)
+    tables = root.xpath("//*[@id='body']//table[contains(concat(' ', normalize-space(@class), ' '), ' forms ')]")
+    if not tables:
+        raise ValueError("Game table not found in response")
+
+    rows = [[cell.text_content() for cell in row.iter('td')] for row in tables[0].iter('tr')]
+    return createRows(rows)
+
+def parseWithStream(html):
+    tableParser = GameTableParser()
+    tableParser.feed(html)
+    tableParser.close()
+    if not tableParser.foundTable:
+        raise ValueError("Game table not found in response")
+
+    return createRows(tableParser.rows)
+
+class GameTableParser(HTMLParser):
+    # Only walks the first "table.forms" inside "#body" and ignores everything else on the page
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.bodyTag = None
+        self.bodyDepth = 0
+        self.tableDepth = 0
+        self.foundTable = False
+        self.done = False
+        self.rows = []
+        self.cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+
+        if self.bodyTag is None:
+            if dict(attrs).get('id') == 'body':
+                self.bodyTag = tag
+                self.bodyDepth = 1
+            return
+
+        if tag == self.bodyTag:
+            self.bodyDepth += 1
+
+        if tag == 'table':
+            if self.tableDepth > 0:
+                self.tableDepth += 1
+            elif 'forms' in (dict(attrs).get('class') or '').split():
+                self.tableDepth = 1
+                self.foundTable = True
+            return
+
+        if self.tableDepth == 0:
+            return
+
+        if tag == 'tr':
+            self.closeCell()
+            self.rows.append([])
+        elif tag == 'td' and self.rows:
+            self.closeCell()
+            self.cell = []
+
+    def handle_endtag(self, tag):
+        if self.done or self.bodyTag is None:
+            return
+
+        if self.tableDepth > 0:
+            if tag == 'td' or tag == 'tr':
+                self.closeCell()
+            elif tag == 'table':
+                self.tableDepth -= 1
+                if self.tableDepth == 0:
+                    self.closeCell()
+                    self.done = True
+                    return
+
+        if tag == self.bodyTag:
+            self.bodyDepth -= 1
+            if self.bodyDepth == 0:
+                self.done = True
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell.append(data)
+
+    def closeCell(self):
+        if self.cell is not None:
+            self.rows[-1].append(''.join(self.cell))
+            self.cell = None
+
+#endregion
+
+BACKENDS = {
+    'bs4': parseWithBeautifulSoup,
+    'lxml': parseWithLxml,
+    'stream': parseWithStream,
+}
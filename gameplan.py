@@ -0,0 +1,203 @@
+# One entry point for the sync and the helper tools: python gameplan.py <command>
+# Every command imports only what it needs, so showing the databases does not load the Google client or the scraper.
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+
+COMMANDS = {
+    'sync': "fetch the games and update the Google calendars once",
+    'daemon': "keep running and poll every club on its own schedule",
+    'list-calendars': "list the calendars of the service account",
+    'delete-calendars': "delete all calendars of the service account and their database entries",
+    'show-games': "print the games stored in the game database",
+    'show-calendars': "print the calendars stored in the calendar database",
+}
+
+
+def main(argv=None):
+    argumentParser = argparse.ArgumentParser(prog='gameplan', description="Keeps Google calendars in sync with the Basketplan games of the configured clubs")
+    subparsers = argumentParser.add_subparsers(dest='command', metavar='command', required=True)
+    for command, description in COMMANDS.items():
+        subparser = subparsers.add_parser(command, help=description, description=description)
+        if command == 'delete-calendars':
+            subparser.add_argument('--yes', action='store_true', help="do not ask for confirmation")
+
+    args = argumentParser.parse_args(argv)
+    return HANDLERS[args.command](args)
+
+#region Commands
+
+def sync(args):
+    import script
+    script.main()
+
+def runDaemon(args):
+    import daemon
+    daemon.main()
+
+def listCalendars(args):
+    from logpipeline import setupLogging
+    from googleclient import authenticate, getGoogleService
+
+    setupLogging()
+    authenticate()
+    service = getGoogleService()
+    pageToken = None
+    while True:
+        calendarList = service.calendarList().list(pageToken=pageToken).execute()
+
+        if (len(calendarList['items']) == 0):
+            logging.info("No calendars found.")
+
+        for cal in calendarList['items']:
+            logMessage = f"Calendar ID: {cal['id']}, Summary: {cal['summary']}"
+            print(logMessage)
+            logging.info(logMessage)
+        pageToken = calendarList.get('nextPageToken')
+        if not pageToken:
+            break
+
+def deleteCalendars(args):
+    # Asked before anything is imported, so cancelling is instant
+    if not args.yes:
+        confirmation = input("Are you sure you want to delete all Google calendars? This is not reversible!\nType 'yes' to confirm: ")
+        if confirmation.lower() != 'yes':
+            print("Operation cancelled. No calendars were deleted.")
+            return
+
+    from logpipeline import setupLogging
+    from googleclient import authenticate
+    setupLogging()
+    authenticate()
+    calCount = deleteGoogleCalendars()
+    logMessage = f"Deleted {calCount} calendars."
+    print(logMessage)
+    logging.info(logMessage)
+
+def deleteGoogleCalendars():
+    from googleclient import getGoogleService
+
+    service = getGoogleService()
+    pageToken = None
+    deletedCalendars = 0
+
+    while True:
+        calendarList = service.calendarList().list(pageToken=pageToken).execute()
+
+        if (len(calendarList['items']) == 0):
+            logging.info("No calendars found.")
+
+        for cal in calendarList['items']:
+            service.calendars().delete(calendarId=cal['id']).execute()
+            deleteCalendarFromDatabase(cal['id'])
+            deletedCalendars += 1
+
+        pageToken = calendarList.get('nextPageToken')
+        if not pageToken:
+            break
+
+    return deletedCalendars
+
+def deleteCalendarFromDatabase(googleCalendarId):
+    from config import CALENDARDBPATH
+    from storage import transaction
+
+    if os.path.exists(CALENDARDBPATH):
+        try:
+            with transaction(CALENDARDBPATH) as c:
+                logging.debug(f"Attempting to delete calendar with Google CalendarID {googleCalendarId} from DB.")
+
+                # If the calendar is not in the database, nothing will happen
+                c.execute('''
+                    DELETE FROM calendar
+                    WHERE googleCalendarId = ?
+                ''', (googleCalendarId,))
+
+                logging.debug(f"Rows updated: {c.rowcount}")
+        except sqlite3.Error as error:
+            logMessage = f"An error occured: {error}"
+            logging.error(logMessage)
+    else:
+        logMessage = f"Database at path: {CALENDARDBPATH} does not exist"
+        logging.warning(logMessage)
+
+def showGames(args):
+    from config import DEBUG, GAMEDBPATH
+
+    # Only the sync migrates the database, one of an older version still has the date text instead of the start time
+    columns = loadRows(GAMEDBPATH, '''
+        PRAGMA table_info(game)
+    ''')
+    if columns is None:
+        return 1
+
+    if any(column['name'] == 'startTime' for column in columns):
+        query = '''
+            SELECT *, datetime(startTime, 'unixepoch') AS startTimeUtc FROM game
+            ORDER BY startTime
+        '''
+    else:
+        query = '''
+            SELECT * FROM game
+            ORDER BY date
+        '''
+
+    games = loadRows(GAMEDBPATH, query)
+    if games is None:
+        return 1
+
+    if (DEBUG):
+        # trim to 2 games only for testing
+        games = games[:2]
+
+    print(f"Loaded {len(games)} games from the database.")
+    printRows(games)
+
+def showCalendars(args):
+    from config import CALENDARDBPATH
+
+    calendars = loadRows(CALENDARDBPATH, '''
+        SELECT * FROM calendar
+    ''')
+    if calendars is None:
+        return 1
+
+    printRows(calendars)
+
+def loadRows(path, query):
+    from urllib.parse import quote
+
+    if not os.path.exists(path):
+        print(f"Database at path: {path} does not exist")
+        return None
+
+    try:
+        # Read only, looking at a database never changes it
+        conn = sqlite3.connect(f'file:{quote(os.path.abspath(path))}?mode=ro', uri=True)
+        conn.row_factory = sqlite3.Row
+        rows = [dict(row) for row in conn.execute(query).fetchall()]
+        conn.close()
+        return rows
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+        return None
+
+def printRows(rows):
+    from pprint import pprint
+    pprint(rows, indent=4)
+
+#endregion
+
+HANDLERS = {
+    'sync': sync,
+    'daemon': runDaemon,
+    'list-calendars': listCalendars,
+    'delete-calendars': deleteCalendars,
+    'show-games': showGames,
+    'show-calendars': showCalendars,
+}
+
+if __name__ == "__main__":
+    sys.exit(main())
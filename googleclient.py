@@ -0,0 +1,134 @@
+# Authenticates with the service account and builds the Google Calendar client, shared by the sync and the helper commands.
+# Credentials and service are created once per process, every worker thread gets its own authorized transport.
+import atexit
+import logging
+import os
+import threading
+
+import httplib2
+import requests
+from google.auth.transport.requests import Request
+from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document, DISCOVERY_URI
+
+import config
+import metrics
+from config import SCOPES, CALENDARDBPATH, CLUBNAMESHORT, SERVICEACCOUNTFILE
+from notifications import sendNotification
+
+# Optional settings, the defaults are used if they are not set in config.py
+REQUESTTIMEOUT = getattr(config, 'REQUESTTIMEOUT', 60)
+DISCOVERYDOCUMENTPATH = getattr(config, 'DISCOVERYDOCUMENTPATH', os.path.join(os.path.dirname(CALENDARDBPATH), 'calendar-v3-discovery.json'))
+CALENDARBACKEND = getattr(config, 'CALENDARBACKEND', 'google')
+FAKECALENDARPATH = getattr(config, 'FAKECALENDARPATH', os.path.join(os.path.dirname(CALENDARDBPATH), 'fake-calendar.json'))
+FAKECALENDARLATENCY = getattr(config, 'FAKECALENDARLATENCY', 0)
+FAKECALENDARERRORRATE = getattr(config, 'FAKECALENDARERRORRATE', 0)
+FAKECALENDARSEED = getattr(config, 'FAKECALENDARSEED', None)
+
+# Google sends all requests of a batch in one HTTP request to this path
+GOOGLEBATCHPATH = '/batch/'
+
+googleCredentials = None
+googleService = None
+threadHttp = threading.local()
+
+
+def authenticate():
+    global googleCredentials
+    # The fake backend runs in-process and needs no credentials
+    if CALENDARBACKEND == 'fake':
+        return None
+
+    try:
+        # Load the service account credentials
+        if googleCredentials is None:
+            googleCredentials = service_account.Credentials.from_service_account_file(
+                SERVICEACCOUNTFILE, scopes=SCOPES)
+
+        # Only fetch a new token if there is none yet or it has expired
+        if not googleCredentials.valid:
+            googleCredentials.refresh(Request())
+    except Exception as e:
+        logMessage = f"Error with service account authentication: {e}"
+        logging.error(logMessage)
+        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+        googleCredentials = None
+
+    return googleCredentials
+
+def getGoogleService():
+    global googleService
+    if CALENDARBACKEND == 'fake':
+        if googleService is None:
+            googleService = createFakeCalendarService()
+        return googleService
+
+    creds = authenticate()
+    if creds:
+        if googleService is None:
+            http = AuthorizedHttp(creds, http=CountingHttp(timeout=REQUESTTIMEOUT))
+            googleService = build_from_document(loadDiscoveryDocument(), http=http)
+        return googleService
+    return None
+
+def createFakeCalendarService():
+    # Only the fake backend needs it
+    from fakecalendar import FakeCalendarService
+
+    service = FakeCalendarService(FAKECALENDARPATH, FAKECALENDARLATENCY, FAKECALENDARERRORRATE, FAKECALENDARSEED)
+    logging.info(f"Using fake calendar backend stored at {FAKECALENDARPATH}")
+    return service
+
+def saveFakeCalendar():
+    # The fake calendar is kept in memory, it is written after every sync and on exit
+    # The service is looked up when it runs, so after a reload of this module only the current one is written
+    if CALENDARBACKEND == 'fake' and googleService is not None:
+        googleService.save()
+
+atexit.register(saveFakeCalendar)
+
+def loadDiscoveryDocument():
+    if os.path.exists(DISCOVERYDOCUMENTPATH):
+        with open(DISCOVERYDOCUMENTPATH, encoding='utf-8') as file:
+            return file.read()
+
+    # Use the document shipped with the client library, and only download it if there is none
+    document = discovery_cache.get_static_doc('calendar', 'v3')
+    if document is None:
+        response = requests.get(DISCOVERY_URI.format(api='calendar', apiVersion='v3'), timeout=REQUESTTIMEOUT)
+        response.raise_for_status()
+        document = response.text
+
+    try:
+        with open(DISCOVERYDOCUMENTPATH, 'w', encoding='utf-8') as file:
+            file.write(document)
+    except OSError as error:
+        logging.warning(f"Unable to store discovery document at {DISCOVERYDOCUMENTPATH}: {error}")
+
+    return document
+
+def getThreadHttp():
+    # httplib2 is not thread-safe, so every worker thread gets its own authorized transport
+    if CALENDARBACKEND == 'fake':
+        return None
+
+    http = getattr(threadHttp, 'http', None)
+    if http is None:
+        http = AuthorizedHttp(authenticate(), http=CountingHttp(timeout=REQUESTTIMEOUT))
+        threadHttp.http = http
+    return http
+
+class CountingHttp(httplib2.Http):
+    # Counts the HTTP requests to Google and their bytes for the run report, a batch is one request with many API calls
+
+    def request(self, uri, method='GET', body=None, headers=None, *args, **kwargs):
+        response, content = super().request(uri, method, body, headers, *args, **kwargs)
+
+        metrics.increment('http_requests', target='google')
+        if GOOGLEBATCHPATH not in uri:
+            metrics.increment('google_api_calls')
+        metrics.increment('bytes', len(body or b''), target='google', direction='sent')
+        metrics.increment('bytes', len(content or b''), target='google', direction='received')
+        return response, content
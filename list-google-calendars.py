@@ -1,26 +1,7 @@
-from script import authenticate, getGoogleService, setupLogging
-import logging
+# Kept for existing habits and cron jobs, the same as: python gameplan.py list-calendars
+import sys
 
-
-def main():
-    setupLogging()
-    authenticate()
-    listGoogleCalendars()
-
-def listGoogleCalendars():
-    service = getGoogleService()
-    page_token = None
-    while True:
-        calendarList = service.calendarList().list(pageToken=page_token).execute()
-
-        if (len(calendarList['items']) == 0):
-            logging.info("No calendars found.")
-
-        for cal in calendarList['items']:
-            logging.info(f"Calendar ID: {cal['id']}, Summary: {cal['summary']}")
-        page_token = calendarList.get('nextPageToken')
-        if not page_token:
-            break
+from gameplan import main
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main(['list-calendars'] + sys.argv[1:]))
@@ -0,0 +1,109 @@
+# Writes the log records from a listener thread, so logging in the loops over games and requests never waits on file I/O.
+# Every record carries the run id and the club and phase it was logged in, the JSON lines format writes them as own fields.
+import atexit
+import contextvars
+import datetime
+import json
+import logging
+import os
+import queue
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
+
+import config
+import metrics
+
+logFields = contextvars.ContextVar('logFields', default={})
+listener = None
+
+
+def setupLogging():
+    # The settings are read on every call, so the daemon picks up a reloaded config
+    logPath = config.LOGPATH
+    logFormat = getattr(config, 'LOGFORMAT', 'text')
+    if not os.path.exists(logPath):
+        os.makedirs(logPath)
+    
+    handler = TimedRotatingFileHandler(
+        filename=os.path.join(logPath, 'app.jsonl' if logFormat == 'json' else 'app.log'),
+        when='midnight',
+        interval=1,
+        backupCount=30,
+        encoding='utf-8',
+    )
+    
+    if logFormat == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('[%(asctime)s] [%(levelname)s] [%(funcName)s] - %(message)s')
+    handler.setFormatter(formatter)
+
+    # The root logger only queues the records, the file is written by the listener thread
+    start(handler, config.LOGLEVEL)
+
+def start(handler, level):
+    global listener
+    stop()
+
+    logQueue = queue.SimpleQueue()
+    queueHandler = QueueHandler(logQueue)
+    # Filters run in the logging thread, where the context of the record is known
+    queueHandler.addFilter(ContextFilter())
+
+    logger = logging.getLogger()
+    logger.setLevel(level)
+    logger.addHandler(queueHandler)
+
+    listener = QueueListener(logQueue, handler, respect_handler_level=True)
+    listener.start()
+
+def stop():
+    # Writes what is still queued
+    global listener
+    if listener is None:
+        return
+
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    listener = None
+
+# Registered on import, so it runs after the exit handlers of the modules imported later, which may still log
+atexit.register(stop)
+
+@contextmanager
+def context(**fields):
+    token = logFields.set({**logFields.get(), **fields})
+    try:
+        yield
+    finally:
+        logFields.reset(token)
+
+def bind(function, **fields):
+    # Runs the function with the current fields and the given ones, also in a worker thread
+    functionContext = contextvars.copy_context()
+    functionContext.run(logFields.set, {**functionContext.get(logFields, {}), **fields})
+    return lambda *args, **kwargs: functionContext.run(function, *args, **kwargs)
+
+class ContextFilter(logging.Filter):
+
+    def filter(self, record):
+        fields = logFields.get()
+        record.runId = metrics.runId
+        record.clubId = fields.get('clubId')
+        record.phase = fields.get('phase')
+        return True
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        # The queue handler already merged the arguments and the traceback into the message
+        return json.dumps({
+            'time': datetime.datetime.fromtimestamp(record.created).astimezone().isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'function': record.funcName,
+            'runId': getattr(record, 'runId', None),
+            'clubId': getattr(record, 'clubId', None),
+            'phase': getattr(record, 'phase', None),
+            'message': record.getMessage(),
+        }, ensure_ascii=False)
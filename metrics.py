@@ -0,0 +1,133 @@
+# Records how long the phases of a run take and counts requests, SQLite statements and transferred bytes.
+# The results are written as a JSON run report and as a Prometheus textfile for the node exporter textfile collector.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PROMETHEUSPREFIX = 'gameplan'
+
+lock = threading.Lock()
+# Also written with every log record, so the logs of a run can be found from its report
+runId = os.urandom(16).hex()
+runStart = time.time()
+runPerfStart = time.perf_counter()
+spans = []
+counters = {}
+
+
+def startRun():
+    global runId, runStart, runPerfStart
+    with lock:
+        runId = os.urandom(16).hex()
+        runStart = time.time()
+        runPerfStart = time.perf_counter()
+        spans.clear()
+        counters.clear()
+
+@contextmanager
+def span(name, **labels):
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        end = time.perf_counter()
+        with lock:
+            spans.append({
+                'name': name,
+                'labels': labels,
+                'start': round(start - runPerfStart, 6),
+                'duration': round(end - start, 6),
+                'failed': failed,
+            })
+
+def increment(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with lock:
+        counters[key] = counters.get(key, 0) + value
+
+def createRunReport():
+    with lock:
+        duration = time.perf_counter() - runPerfStart
+        return {
+            'runId': runId,
+            'start': runStart,
+            'duration': round(duration, 6),
+            'phases': summarizeSpans(spans),
+            'spans': list(spans),
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value} for (name, labels), value in sorted(counters.items())],
+        }
+
+def summarizeSpans(spanList):
+    # Spans of the same phase and labels, e.g. one per batch, are added up
+    phases = {}
+    for entry in spanList:
+        key = (entry['name'], tuple(sorted(entry['labels'].items())))
+        phase = phases.setdefault(key, {'name': entry['name'], 'labels': entry['labels'], 'count': 0, 'duration': 0, 'failed': 0})
+        phase['count'] += 1
+        phase['duration'] = round(phase['duration'] + entry['duration'], 6)
+        phase['failed'] += entry['failed']
+    return list(phases.values())
+
+def writeRunReport(path):
+    writeAtomically(path, json.dumps(createRunReport(), indent=2))
+
+def writePrometheusTextfile(path):
+    report = createRunReport()
+    lines = [
+        f'# HELP {PROMETHEUSPREFIX}_last_run_timestamp_seconds Start time of the last run.',
+        f'# TYPE {PROMETHEUSPREFIX}_last_run_timestamp_seconds gauge',
+        f'{PROMETHEUSPREFIX}_last_run_timestamp_seconds {report["start"]:.3f}',
+        f'# HELP {PROMETHEUSPREFIX}_last_run_duration_seconds Duration of the last run.',
+        f'# TYPE {PROMETHEUSPREFIX}_last_run_duration_seconds gauge',
+        f'{PROMETHEUSPREFIX}_last_run_duration_seconds {report["duration"]:.6f}',
+        f'# HELP {PROMETHEUSPREFIX}_phase_duration_seconds Time spent in a phase during the last run.',
+        f'# TYPE {PROMETHEUSPREFIX}_phase_duration_seconds gauge',
+    ]
+    for phase in report['phases']:
+        lines.append(f'{PROMETHEUSPREFIX}_phase_duration_seconds{formatLabels(dict(phase["labels"], phase=phase["name"]))} {phase["duration"]:.6f}')
+
+    lines += [
+        f'# HELP {PROMETHEUSPREFIX}_phase_count Number of times a phase ran during the last run.',
+        f'# TYPE {PROMETHEUSPREFIX}_phase_count gauge',
+    ]
+    for phase in report['phases']:
+        lines.append(f'{PROMETHEUSPREFIX}_phase_count{formatLabels(dict(phase["labels"], phase=phase["name"]))} {phase["count"]}')
+
+    # Counters start at zero every run, so they are exported as gauges of the last run
+    counterNames = sorted({counter['name'] for counter in report['counters']})
+    for name in counterNames:
+        lines += [
+            f'# HELP {PROMETHEUSPREFIX}_last_run_{name} Value of the {name} counter in the last run.',
+            f'# TYPE {PROMETHEUSPREFIX}_last_run_{name} gauge',
+        ]
+        for counter in report['counters']:
+            if counter['name'] == name:
+                lines.append(f'{PROMETHEUSPREFIX}_last_run_{name}{formatLabels(counter["labels"])} {counter["value"]}')
+
+    writeAtomically(path, '\n'.join(lines) + '\n')
+
+def formatLabels(labels):
+    if not labels:
+        return ''
+    values = ','.join(f'{key}="{escapeLabelValue(value)}"' for key, value in sorted(labels.items()))
+    return '{' + values + '}'
+
+def escapeLabelValue(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def writeAtomically(path, content):
+    # The node exporter must never read a half written file
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    temporaryPath = f'{path}.{os.getpid()}.tmp'
+    with open(temporaryPath, 'w', encoding='utf-8') as file:
+        file.write(content)
+    os.replace(temporaryPath, path)
@@ -0,0 +1,53 @@
+# Sends the Gotify notifications of the sync and the helper commands, they are queued and sent by the background notifier.
+import logging
+
+import requests
+
+import config
+import metrics
+# Before notifier, so the log listener is stopped only after the last notifications were sent on exit
+import logpipeline
+import notifier
+from config import GOTIFYURL, GOTIFYTOKEN
+
+# Optional settings, the defaults are used if they are not set in config.py
+REQUESTTIMEOUT = getattr(config, 'REQUESTTIMEOUT', 60)
+NOTIFICATIONQUEUESIZE = getattr(config, 'NOTIFICATIONQUEUESIZE', 100)
+NOTIFICATIONWINDOW = getattr(config, 'NOTIFICATIONWINDOW', 5)
+NOTIFICATIONREPEATWINDOW = getattr(config, 'NOTIFICATIONREPEATWINDOW', 60 * 60)
+NOTIFICATIONSPERMINUTE = getattr(config, 'NOTIFICATIONSPERMINUTE', 6)
+
+
+def sendNotification(title, message):
+
+    if GOTIFYURL == None or GOTIFYTOKEN == None:
+        logging.warning("Gotify URL or Token not set. Skipping notification.")
+        return
+
+    # Only queued, the notifier thread merges and sends it
+    notifier.notify(title, message)
+
+def postNotification(title, message):
+    # Payload for the notification
+    payload = {
+        "title": title,
+        "message": message,
+        "priority": 5
+    }
+
+    # Headers for the request
+    headers = {
+        "X-Gotify-Key": GOTIFYTOKEN
+    }
+
+    # Send the POST request to Gotify
+    response = requests.post(GOTIFYURL, json=payload, headers=headers, timeout=REQUESTTIMEOUT)
+    metrics.increment('http_requests', target='gotify')
+
+    # Check if the request was successful
+    if response.status_code == 200:
+        logging.debug("Notification sent successfully!")
+    else:
+        logging.error(f"Failed to send notification: {response.status_code} - {response.text}")
+
+notifier.configure(postNotification, NOTIFICATIONQUEUESIZE, NOTIFICATIONWINDOW, NOTIFICATIONREPEATWINDOW, NOTIFICATIONSPERMINUTE, REQUESTTIMEOUT)
@@ -0,0 +1,157 @@
+# Sends the notifications from a background thread, so a slow or unreachable Gotify server never holds up a sync.
+# Notifications arriving close together are merged into one digest per title, a message that was just sent is held back for a while
+# and only a few digests are sent per minute. Whatever is still queued is sent on exit.
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+lock = threading.Lock()
+pending = None
+worker = None
+stopRequested = threading.Event()
+droppedCount = 0
+
+# Only used by the worker thread
+lastSent = {}
+heldBack = {}
+sendTimes = deque()
+
+send = None
+queueSize = 100
+window = 5
+dedupWindow = 3600
+perMinute = 6
+flushTimeout = 30
+
+
+def configure(sendFunction, maxQueued=100, collectWindow=5, repeatWindow=3600, sendsPerMinute=6, timeout=30):
+    global send, queueSize, window, dedupWindow, perMinute, flushTimeout
+    send = sendFunction
+    queueSize = maxQueued
+    window = collectWindow
+    dedupWindow = repeatWindow
+    perMinute = sendsPerMinute
+    flushTimeout = timeout
+
+def notify(title, message):
+    global droppedCount
+    startWorker()
+    try:
+        pending.put_nowait((title, message))
+    except queue.Full:
+        with lock:
+            droppedCount += 1
+
+def startWorker():
+    global pending, worker
+    with lock:
+        if worker is None:
+            pending = queue.Queue(maxsize=queueSize)
+            worker = threading.Thread(target=run, name='notifier', daemon=True)
+            worker.start()
+
+def flush():
+    if worker is None:
+        return
+
+    stopRequested.set()
+    try:
+        pending.put(None, timeout=flushTimeout)
+    except queue.Full:
+        logging.warning("Notification queue could not be flushed")
+        return
+    worker.join(flushTimeout)
+
+atexit.register(flush)
+
+def run():
+    while True:
+        notification = pending.get()
+        if notification is None:
+            return
+
+        batch = [notification]
+        stopping = collect(batch, time.monotonic() + window)
+        sendDigests(batch)
+        if stopping:
+            return
+
+def collect(batch, deadline):
+    # Adds everything arriving until the deadline, on exit only what is already queued
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            if stopRequested.is_set() or remaining <= 0:
+                notification = pending.get_nowait()
+            else:
+                notification = pending.get(timeout=remaining)
+        except queue.Empty:
+            if stopRequested.is_set() or remaining <= 0:
+                return False
+            continue
+
+        if notification is None:
+            return True
+        batch.append(notification)
+
+def sendDigests(batch):
+    global droppedCount
+    now = time.time()
+
+    digests = {}
+    for (title, message), count in forgetSentBefore(now - dedupWindow):
+        digests.setdefault(title, {})[message] = count
+    for title, message in batch:
+        messages = digests.setdefault(title, {})
+        messages[message] = messages.get(message, 0) + 1
+
+    with lock:
+        dropped, droppedCount = droppedCount, 0
+
+    for title, messages in digests.items():
+        lines = []
+        for message, count in messages.items():
+            key = (title, message)
+            if key in lastSent:
+                heldBack[key] = heldBack.get(key, 0) + count
+                continue
+
+            lastSent[key] = now
+            lines.append(message if count == 1 else f"{message}\n({count} times)")
+
+        if dropped:
+            lines.append(f"{dropped} notifications were dropped, the queue was full")
+            dropped = 0
+
+        if lines:
+            waitForRateLimit()
+            deliver(title, '\n\n'.join(lines))
+
+def forgetSentBefore(sentBefore):
+    # Messages held back in the meantime are returned, so their repeats are still reported once
+    repeated = []
+    for key, sentAt in list(lastSent.items()):
+        if sentAt < sentBefore:
+            del lastSent[key]
+            if key in heldBack:
+                repeated.append((key, heldBack.pop(key)))
+    return repeated
+
+def waitForRateLimit():
+    while True:
+        while sendTimes and sendTimes[0] <= time.monotonic() - 60:
+            sendTimes.popleft()
+        if len(sendTimes) < perMinute:
+            return
+        time.sleep(sendTimes[0] + 60 - time.monotonic())
+
+def deliver(title, message):
+    sendTimes.append(time.monotonic())
+    try:
+        send(title, message)
+    except Exception as e:
+        # Never reported with a notification, that would only queue the next failing one
+        logging.error(f"Failed to send notification: {e}")
@@ -0,0 +1,172 @@
+# Versioned schema of the game and calendar databases, the version of a database is kept in PRAGMA user_version.
+# Every migration runs in its own transaction together with the version update, so a database is never left half migrated.
+from storage import getConnection, transaction
+
+
+def migrateGameSchema(path):
+    return migrate(path, GAMEMIGRATIONS)
+
+def migrateCalendarSchema(path):
+    return migrate(path, CALENDARMIGRATIONS)
+
+def migrate(path, migrations):
+    version = getSchemaVersion(getConnection(path))
+    for targetVersion, migration in migrations:
+        if targetVersion <= version:
+            continue
+
+        with transaction(path) as c:
+            # Read again inside the transaction, another process may have migrated in the meantime
+            if getSchemaVersion(c.connection) >= targetVersion:
+                continue
+            migration(c)
+            c.execute(f'PRAGMA user_version = {targetVersion}')
+        version = targetVersion
+
+    return version
+
+def getSchemaVersion(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def addMissingColumns(c, table, columns):
+    existingColumns = [column['name'] for column in c.execute(f'PRAGMA table_info({table})').fetchall()]
+    for name, definition in columns.items():
+        if name not in existingColumns:
+            c.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+
+#region Game
+
+def createGameBaseline(c):
+    # Databases from before the versioning have no version, but may have any of the older layouts
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS game (
+            id text PRIMARY KEY,
+            date DATETIME NULL,
+            league text,
+            homeTeam text,
+            awayTeam text,
+            gym text,
+            result text,
+            clubCalendarEventId text NULL,
+            teamCalendarEventId text NULL,
+            teamCalendarId text,
+            FOREIGN KEY (teamCalendarId) REFERENCES calendar(id)
+        )
+    ''')
+    addMissingColumns(c, 'game', {'clubCalendarFingerprint': 'text NULL', 'teamCalendarFingerprint': 'text NULL'})
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS fetchCache (
+            clubId text PRIMARY KEY,
+            requestKey text,
+            contentDigest text,
+            gamesDigest text,
+            etag text NULL,
+            lastModified text NULL,
+            fetchedAt integer
+        )
+    ''')
+    addMissingColumns(c, 'fetchCache', {'gameDates': 'text NULL'})
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS eventJournal (
+            eventId text PRIMARY KEY,
+            gameId text,
+            field text,
+            calendarId text
+        )
+    ''')
+
+def storeStartTimeAsEpoch(c):
+    # Only needed to convert the dates of older databases
+    from datecodec import parseIsoDate, toEpoch
+
+    c.execute('''
+        CREATE TABLE gameMigration (
+            id text PRIMARY KEY,
+            startTime integer NULL,
+            league text,
+            homeTeam text,
+            awayTeam text,
+            gym text,
+            result text,
+            clubCalendarEventId text NULL,
+            teamCalendarEventId text NULL,
+            teamCalendarId text,
+            clubCalendarFingerprint text NULL,
+            teamCalendarFingerprint text NULL,
+            FOREIGN KEY (teamCalendarId) REFERENCES calendar(id)
+        )
+    ''')
+
+    games = c.execute('''
+        SELECT * FROM game
+    ''').fetchall()
+    c.executemany('''
+        INSERT INTO gameMigration (id, startTime, league, homeTeam, awayTeam, gym, result, clubCalendarEventId, teamCalendarEventId, teamCalendarId, clubCalendarFingerprint, teamCalendarFingerprint)
+        VALUES (:id, :startTime, :league, :homeTeam, :awayTeam, :gym, :result, :clubCalendarEventId, :teamCalendarEventId, :teamCalendarId, :clubCalendarFingerprint, :teamCalendarFingerprint)
+    ''', [dict(game, startTime=toEpoch(parseIsoDate(game['date'])) if game['date'] else None) for game in games])
+
+    c.execute('DROP TABLE game')
+    c.execute('ALTER TABLE gameMigration RENAME TO game')
+
+    c.execute('CREATE INDEX gameLeague ON game (league)')
+    c.execute('CREATE INDEX gameTeamCalendarId ON game (teamCalendarId)')
+    c.execute('CREATE INDEX gameClubCalendarEventId ON game (clubCalendarEventId)')
+    c.execute('CREATE INDEX gameTeamCalendarEventId ON game (teamCalendarEventId)')
+
+    # The cached digests and game dates were made from the old date text
+    c.execute('DELETE FROM fetchCache')
+
+def addFullFetchTime(c):
+    # Time of the last fetch of the whole season, the runs in between only fetch a window of recent games
+    addMissingColumns(c, 'fetchCache', {'fullFetchedAt': 'integer NULL'})
+
+def addGameCount(c):
+    # Number of games on the cached page, reported as untouched when the page has not changed
+    addMissingColumns(c, 'fetchCache', {'gameCount': 'integer NULL'})
+
+#endregion
+
+#region Calendar
+
+def createCalendarBaseline(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS calendar (
+            id text PRIMARY KEY,
+            googleCalendarId text,
+            league text NULL,
+            isClubCalendar boolean,
+            isShared boolean DEFAULT 0
+        )
+    ''')
+    addMissingColumns(c, 'calendar', {'syncToken': 'text NULL', 'lastEventCheck': 'integer NULL'})
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS event (
+            googleCalendarId text,
+            id text,
+            data text,
+            PRIMARY KEY (googleCalendarId, id)
+        )
+    ''')
+
+def addCalendarIndexes(c):
+    # The events are already ordered by googleCalendarId through their primary key
+    c.execute('CREATE INDEX calendarLeague ON calendar (league)')
+    c.execute('CREATE INDEX calendarGoogleCalendarId ON calendar (googleCalendarId)')
+    c.execute('CREATE INDEX calendarIsClubCalendar ON calendar (isClubCalendar)')
+
+#endregion
+
+GAMEMIGRATIONS = [
+    (1, createGameBaseline),
+    (2, storeStartTimeAsEpoch),
+    (3, addFullFetchTime),
+    (4, addGameCount),
+]
+
+CALENDARMIGRATIONS = [
+    (1, createCalendarBaseline),
+    (2, addCalendarIndexes),
+]
@@ -1,65 +1,103 @@
 from config import DEBUG, LOGLEVEL, LOGPATH, SCOPES, GAMEDBPATH, CALENDARDBPATH, PROBASKETCLUBS, CLUBNAME, CLUBNAMESHORT, CLUBGAMESURL, GOTIFYURL, GOTIFYTOKEN, SERVICEACCOUNTFILE, PERSONALEMAIL
 import time
 import datetime
-import pytz
-import locale
 import os.path
 import requests
-from bs4 import BeautifulSoup
 import os
 import uuid
 import sqlite3
+import hashlib
+import random
+import threading
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
-from dateutil import parser
-from tenacity import retry, stop_after_attempt, wait_exponential
+import config
+import metrics
+import logpipeline
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
+from googleclient import authenticate, getGoogleService, getThreadHttp, saveFakeCalendar
+from logpipeline import setupLogging
+from notifications import sendNotification
+from gameparser import parseGameRows
+from datecodec import ZURICH, parseBasketplanDate, formatBasketplanDate, parseIsoDate, toEpoch, fromEpoch
+from schema import migrateGameSchema, migrateCalendarSchema
+from storage import getConnection, transaction, attachedDatabases
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Optional settings, the defaults are used if they are not set in config.py
+SCRAPECONCURRENCY = getattr(config, 'SCRAPECONCURRENCY', 4)
+REQUESTTIMEOUT = getattr(config, 'REQUESTTIMEOUT', 60)
+PARSERBACKEND = getattr(config, 'PARSERBACKEND', None)
+EVENTSYNCMODE = getattr(config, 'EVENTSYNCMODE', 'incremental')
+EVENTPAGESIZE = getattr(config, 'EVENTPAGESIZE', 2500)
+EVENTFETCHCONCURRENCY = getattr(config, 'EVENTFETCHCONCURRENCY', 4)
+BATCHSIZE = getattr(config, 'BATCHSIZE', 50)
+BATCHCONCURRENCY = getattr(config, 'BATCHCONCURRENCY', 2)
+BATCHATTEMPTS = getattr(config, 'BATCHATTEMPTS', 5)
+BACKOFFBASE = getattr(config, 'BACKOFFBASE', 1)
+BACKOFFMAX = getattr(config, 'BACKOFFMAX', 32)
+DRIFTCHECKINTERVAL = getattr(config, 'DRIFTCHECKINTERVAL', 24 * 7)
+RUNREPORTPATH = getattr(config, 'RUNREPORTPATH', os.path.join(LOGPATH, 'run-report.json'))
+PROMETHEUSTEXTFILEPATH = getattr(config, 'PROMETHEUSTEXTFILEPATH', None)
+LOCKPATH = getattr(config, 'LOCKPATH', os.path.join(os.path.dirname(GAMEDBPATH), 'gameplan.lock'))
+POLLINTERVALS = getattr(config, 'POLLINTERVALS', [(1, 15), (7, 60), (30, 360)])
+POLLINTERVALOFFSEASON = getattr(config, 'POLLINTERVALOFFSEASON', 24 * 60)
+SEASONSTARTMONTH = getattr(config, 'SEASONSTARTMONTH', 7)
+FETCHWINDOWDAYS = getattr(config, 'FETCHWINDOWDAYS', 14)
+FULLFETCHINTERVAL = getattr(config, 'FULLFETCHINTERVAL', 24)
+FETCHPAGEDAYS = getattr(config, 'FETCHPAGEDAYS', None)
+
+# Errors of single batch requests that are worth sending again
+RETRYABLESTATUS = (429, 500, 502, 503, 504)
+RETRYABLEREASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+# Basketplan returns at most this many games per request, a date range that reaches it is split and fetched again
+MAXRESULTS = 500
+
+# The calendar database is attached to the game connection under this name while games and calendars are joined
+CALENDARATTACHMENT = {'calendarDB': CALENDARDBPATH}
+
+# Fingerprint column of the last pushed event body, per event id column
+FINGERPRINTFIELDS = {'clubCalendarEventId': 'clubCalendarFingerprint', 'teamCalendarEventId': 'teamCalendarFingerprint'}
 
 #region Main
 
 def main():
     setupLogging()
+    # Only one run at a time, a cron run that overlaps a running one or the daemon is skipped
+    instanceLock = acquireInstanceLock()
+    if instanceLock is None:
+        return
+
+    runSync(PROBASKETCLUBS)
+
+def runSync(clubs):
     logStartTime()
     authenticate()
-    for club in PROBASKETCLUBS:
-        updateGames(club)
-    updateCalendars()
-    checkGames()
+    with logpipeline.context(phase='games'):
+        gameCounts = updateAllGames(clubs)
+    with logpipeline.context(phase='calendars'):
+        updateCalendars()
+    with logpipeline.context(phase='events'):
+        checkGames(gameCounts)
+    # Before the daemon may reload the config, which creates the fake calendar again from its file
+    saveFakeCalendar()
     logEndTime()
+    writeRunReports()
 
 #endregion
 
 #region Google
 
-def authenticate():
-    creds = None
-    try:
-        # Load the service account credentials
-        creds = service_account.Credentials.from_service_account_file(
-            SERVICEACCOUNTFILE, scopes=SCOPES)
-        
-        # Refresh the token if necessary
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-    except Exception as e:
-        logMessage = f"Error with service account authentication: {e}"
-        logging.error(logMessage)
-        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-        creds = None
-    
-    return creds
-
-def getGoogleService():
-    creds = authenticate()
-    if creds:
-        service = build('calendar', 'v3', credentials=creds, cache_discovery=False)
-        return service
-    return None
-
 def createGoogleCalendar(league=None):
     try:
         service = getGoogleService()
@@ -90,128 +128,293 @@ def createGoogleCalendar(league=None):
         logging.error(logMessage)
         sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
 
-def fetchEvents(calendar):
+def downloadEvents(calendar, http=None):
+    # Only does HTTP, so it can run in a worker thread with its own transport
     try:
         service = getGoogleService()
-        events_result = service.events().list(calendarId=calendar['googleCalendarId'], maxResults=500, singleEvents=True, orderBy="startTime").execute()
-        events = events_result.get("items", [])
+        syncToken = calendar.get('syncToken') if EVENTSYNCMODE == 'incremental' else None
 
-        if not events:
-            logging.info(f"No events found for calendar {calendar['league']}")
-            return
+        try:
+            events, nextSyncToken = listEvents(service, calendar['googleCalendarId'], syncToken, http)
+        except HttpError as error:
+            # An expired sync token is answered with 410 Gone, the calendar then has to be synced fully again
+            if syncToken is None or error.resp.status != 410:
+                raise
+            logging.info(f"Sync token expired for calendar {calendar['league']}, starting a full sync")
+            syncToken = None
+            events, nextSyncToken = listEvents(service, calendar['googleCalendarId'], None, http)
 
-        return events
+        return {'events': events, 'syncToken': nextSyncToken, 'fullSync': syncToken is None}
 
     except HttpError as error:
         logMessage = f"An error occurred: {error}"
         logging.error(logMessage)
         sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
 
+def applyEvents(calendar, downloaded):
+    events = downloaded['events']
+    if EVENTSYNCMODE == 'incremental':
+        logging.debug("Received %s changed events for calendar %s", len(events), calendar['league'])
+        events = storeCalendarEvents(calendar['googleCalendarId'], events, downloaded['syncToken'], downloaded['fullSync'])
+
+    if not events:
+        logging.info(f"No events found for calendar {calendar['league']}")
+        return
+
+    return events
+
+def downloadEventsInThread(calendar):
+    return downloadEvents(calendar, getThreadHttp())
+
+def listEvents(service, calendarId, syncToken=None, http=None):
+    # Follows all pages, the sync token for the next run is only part of the last page
+    events = []
+    pageToken = None
+    while True:
+        request = {
+            'calendarId': calendarId,
+            'maxResults': EVENTPAGESIZE,
+            'singleEvents': True,
+            'pageToken': pageToken,
+        }
+        if syncToken is not None:
+            request['syncToken'] = syncToken
+
+        eventsResult = service.events().list(**request).execute(http=http)
+        events.extend(eventsResult.get('items', []))
+
+        pageToken = eventsResult.get('nextPageToken')
+        if not pageToken:
+            return events, eventsResult.get('nextSyncToken')
+
 def bulkUpdateEvents(games, case='update', clubCalendarId=None):
     service = getGoogleService()
     results = []
     gameMap = {}
-    successful_requests = set()
-    request_id_to_callback = {}
-
-    def callback(request_id, response, exception):
-        if exception is not None:
-            logMessage = f"An error occurred while creating or updating an event: {exception}"
-            logging.error(logMessage)
-            sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-        else:
-            event_id = response.get('id') if response else None
-            results.append({'request_id': request_id, 'status': 'success', 'response': response, 'event_id': event_id})
-            game = gameMap[request_id]
-            field = 'teamCalendarEventId' if clubCalendarId is None else 'clubCalendarEventId'
-            updateGameDB(game['id'], field, event_id)
-            successful_requests.add(request_id)
-
-    calendar_batches = {}
+    batchRequests = []
+    journalEntries = {}
+    fingerprints = {}
+    field = 'teamCalendarEventId' if clubCalendarId is None else 'clubCalendarEventId'
 
     for game in games:
-        startDateTime = parser.parse(game['date'])
-        zurich_tz = pytz.timezone('Europe/Zurich')
-        startDateTime = startDateTime.astimezone(zurich_tz)
-        endDateTime = startDateTime + datetime.timedelta(hours=2)
-
-        event = {
-            'summary': f'{game["league"]} {game["homeTeam"]} vs. {game["awayTeam"]}',
-            'location': game['gym'],
-            'description': 'SpielNr. ' + game['id'],  # Add this line
-            'start': {
-                'dateTime': startDateTime.isoformat(),
-                'timeZone': 'Europe/Zurich',
-            },
-            'end': {
-                'dateTime': endDateTime.isoformat(),
-                'timeZone': 'Europe/Zurich',
-            },
-            'reminders': {
-                'useDefault': False,
-                'overrides': [
-                    {'method': 'popup', 'minutes': 120},
-                ],
-            },
-        }
+        event = createEventBody(game)
+        fingerprints[game['id']] = createEventFingerprint(event)
 
         request_id = str(uuid.uuid4())
         gameMap[request_id] = game
-        logging.debug(f"Request ID: {request_id} for game ID: {game['id']}")
+        logging.debug("Request ID: %s for game ID: %s", request_id, game['id'])
 
         calendar_id = game['teamCalendarId'] if clubCalendarId is None else clubCalendarId
 
-        if calendar_id not in calendar_batches:
-            calendar_batches[calendar_id] = service.new_batch_http_request()
-
         if case == 'update':
-            if clubCalendarId is None:
-                calendar_batches[calendar_id].add(service.events().patch(calendarId=game['teamCalendarId'], eventId=game['teamCalendarEventId'], body=event), callback=callback, request_id=request_id)
-            else:
-                calendar_batches[calendar_id].add(service.events().patch(calendarId=clubCalendarId, eventId=game['clubCalendarEventId'], body=event), callback=callback, request_id=request_id)
+            batchRequests.append((request_id, service.events().patch(calendarId=calendar_id, eventId=game[field], body=event)))
         elif case == 'create':
-            if clubCalendarId is None:
-                calendar_batches[calendar_id].add(service.events().insert(calendarId=game['teamCalendarId'], body=event), callback=callback, request_id=request_id)
-            else:
-                calendar_batches[calendar_id].add(service.events().insert(calendarId=clubCalendarId, body=event), callback=callback, request_id=request_id)
+            # The id is set here, so it is journaled before Google creates the event
+            event['id'] = uuid.uuid4().hex
+            journalEntries[request_id] = {
+                'gameId': game['id'],
+                'field': field,
+                'calendarId': calendar_id,
+                'eventId': event['id'],
+            }
+            batchRequests.append((request_id, service.events().insert(calendarId=calendar_id, body=event)))
+
+    def beforeBatch(chunk):
+        journalEvents([journalEntries[request_id] for request_id, request in chunk if request_id in journalEntries])
+
+    def afterBatch(chunk, outcomes):
+        # Event ids of a batch are written with one statement
+        eventIdUpdates = []
+        answeredEventIds = []
+        for request_id, outcome in outcomes.items():
+            if request_id in journalEntries and not outcome['batchFailed']:
+                answeredEventIds.append(journalEntries[request_id]['eventId'])
+
+            response = outcome['response']
+            if outcome['exception'] is not None:
+                # A conflict on insert means an earlier attempt already created the event with our id
+                if case == 'create' and outcome['error']['status'] == 409:
+                    response = {'id': journalEntries[request_id]['eventId']}
+                else:
+                    logging.error("An error occurred while creating or updating an event for game %s: %s", gameMap[request_id]['id'], outcome['exception'])
+                    results.append(createFailedResult(request_id, gameMap[request_id], outcome))
+                    continue
 
-        request_id_to_callback[request_id] = callback
+            event_id = response.get('id') if response else None
+            results.append({'request_id': request_id, 'status': 'success', 'response': response, 'event_id': event_id})
+            gameId = gameMap[request_id]['id']
+            eventIdUpdates.append({'gameId': gameId, 'eventId': event_id, 'fingerprint': fingerprints[gameId]})
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def execute_batch(batch, calendar_id):
-        try:
-            batch.execute()
-        except AttributeError as e:
-            logging.error(f"AttributeError during batch execution for calendar ID {calendar_id}: {e}")
-            raise
+        flushEventIds(field, eventIdUpdates, answeredEventIds)
 
-    for calendar_id, batch in calendar_batches.items():
-        try:
-            execute_batch(batch, calendar_id)
-            # Remove successful requests from the batch
-            for request_id in list(request_id_to_callback.keys()):
-                if request_id in successful_requests:
-                    del request_id_to_callback[request_id]
-        except Exception as e:
-            logMessage = f"Batch execution failed for calendar ID {calendar_id}: {e}"
-            logging.error(logMessage)
-            sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+    with metrics.span('executeBatches', operation=case, calendar='team' if clubCalendarId is None else 'club'):
+        executeBatches(batchRequests, beforeBatch, afterBatch)
 
     return results
 
+def createEventBody(game):
+    startDateTime = fromEpoch(game['startTime'])
+    endDateTime = startDateTime + datetime.timedelta(hours=2)
+
+    return {
+        'summary': f'{game["league"]} {game["homeTeam"]} vs. {game["awayTeam"]}',
+        'location': game['gym'],
+        'description': 'SpielNr. ' + game['id'],
+        'start': {
+            'dateTime': startDateTime.isoformat(),
+            'timeZone': 'Europe/Zurich',
+        },
+        'end': {
+            'dateTime': endDateTime.isoformat(),
+            'timeZone': 'Europe/Zurich',
+        },
+        'reminders': {
+            'useDefault': False,
+            'overrides': [
+                {'method': 'popup', 'minutes': 120},
+            ],
+        },
+    }
+
+def createEventFingerprint(event):
+    # Covers the fields that are taken from the game, so a changed game changes the fingerprint
+    return createDigest({key: event[key] for key in ('summary', 'location', 'description', 'start', 'end')})
+
+def executeBatches(batchRequests, beforeBatch=None, afterBatch=None):
+    # Splits the requests into batches of BATCHSIZE and keeps up to BATCHCONCURRENCY of them in flight
+    service = getGoogleService()
+    outcomes = {}
+    batchSize = max(1, min(BATCHSIZE, 1000))
+    pendingRequests = batchRequests
+    attempt = 0
+
+    while pendingRequests:
+        if attempt > 0:
+            # Exponential backoff with full jitter before the failed requests are sent again
+            delay = random.uniform(0, min(BACKOFFMAX, BACKOFFBASE * 2 ** (attempt - 1)))
+            logging.info("Retrying %s requests in %.1fs (attempt %s of %s)", len(pendingRequests), delay, attempt + 1, BATCHATTEMPTS)
+            time.sleep(delay)
+
+        chunks = [pendingRequests[index:index + batchSize] for index in range(0, len(pendingRequests), batchSize)]
+        retryRequests = []
+        lastAttempt = attempt + 1 >= BATCHATTEMPTS
+
+        with ThreadPoolExecutor(max_workers=max(1, BATCHCONCURRENCY)) as executor:
+            futures = {}
+            for chunk in chunks:
+                if beforeBatch:
+                    try:
+                        beforeBatch(chunk)
+                    except Exception as e:
+                        logMessage = f"Batch of {len(chunk)} requests not sent, preparing it failed: {e}"
+                        logging.error(logMessage)
+                        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+                        continue
+
+                futures[executor.submit(executeBatch, service, chunk)] = chunk
+
+            # Callers get the final outcomes of each batch on this thread, as soon as the batch is done
+            for future in as_completed(futures):
+                chunk = futures[future]
+                batchOutcomes = future.result()
+                finalOutcomes = {}
+                for request_id, request in chunk:
+                    outcome = batchOutcomes[request_id]
+                    outcome['attempts'] = attempt + 1
+                    if outcome['retryable'] and not lastAttempt:
+                        retryRequests.append((request_id, request))
+                    else:
+                        finalOutcomes[request_id] = outcome
+
+                outcomes.update(finalOutcomes)
+                if afterBatch and finalOutcomes:
+                    afterBatch(chunk, finalOutcomes)
+
+        pendingRequests = retryRequests
+        attempt += 1
+
+    return outcomes
+
+def executeBatch(service, chunk):
+    outcomes = {}
+
+    def callback(request_id, response, exception):
+        outcomes[request_id] = createBatchOutcome(response, exception)
+
+    batch = service.new_batch_http_request(callback=callback)
+    for request_id, request in chunk:
+        batch.add(request, request_id=request_id)
+
+    metrics.increment('google_api_calls', len(chunk))
+    try:
+        batch.execute(http=getThreadHttp())
+    except Exception as e:
+        logging.warning("Batch execution failed for %s requests: %s", len(chunk), e)
+        # Requests without an answer get the error of the whole batch, they can all be sent again
+        for request_id, request in chunk:
+            if request_id not in outcomes:
+                outcomes[request_id] = createBatchOutcome(None, e, True)
+
+    return outcomes
+
+def createBatchOutcome(response, exception, batchFailed=False):
+    outcome = {'response': response, 'exception': exception, 'batchFailed': batchFailed, 'retryable': False, 'error': None}
+    if exception is None:
+        return outcome
+
+    if isinstance(exception, HttpError):
+        status = exception.resp.status
+        reason = getHttpErrorReason(exception)
+        outcome['retryable'] = status in RETRYABLESTATUS or (status == 403 and reason in RETRYABLEREASONS)
+    else:
+        # Transport errors, the request may not have reached Google
+        status = None
+        reason = type(exception).__name__
+        outcome['retryable'] = True
+
+    outcome['error'] = {'status': status, 'reason': reason, 'message': str(exception)}
+    return outcome
+
+def getHttpErrorReason(error):
+    try:
+        content = json.loads(error.content.decode('utf-8'))
+        return content['error']['errors'][0]['reason']
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return error.resp.reason if error.resp is not None else None
+
+def createFailedResult(request_id, game, outcome):
+    return {
+        'request_id': request_id,
+        'status': 'failed',
+        'gameId': game['id'],
+        'attempts': outcome['attempts'],
+        'error': outcome['error'],
+    }
+
 def fetchCalendarEvents(loadedCalendars):
-    allEvents = []
-    for calendar in loadedCalendars:
-        events = fetchEvents(calendar)
-        if events != None:
-            allEvents.extend(events)
+    # Events are grouped by the Google calendar they belong to
+    eventsByCalendar = {}
+    if getGoogleService() is None:
+        return eventsByCalendar
+
+    # The calendars are downloaded concurrently, the results are stored here as they arrive
+    with ThreadPoolExecutor(max_workers=max(1, EVENTFETCHCONCURRENCY)) as executor:
+        futures = {executor.submit(downloadEventsInThread, calendar): calendar for calendar in loadedCalendars}
+        for future in as_completed(futures):
+            calendar = futures[future]
+            downloaded = future.result()
+            # Calendars that could not be loaded are left out and checked by their fingerprints
+            if downloaded is None:
+                continue
+            events = applyEvents(calendar, downloaded)
+            eventsByCalendar[calendar['googleCalendarId']] = events or []
+            updateCalendarDBByGoogleId(calendar['googleCalendarId'], 'lastEventCheck', int(time.time()))
 
-    return allEvents
+    return eventsByCalendar
 
 def shareCalendars():
-    creds = authenticate()
-    if creds:
-        service = build('calendar', 'v3', credentials=creds)
+    service = getGoogleService()
+    if service:
         try:
             calendar_list = service.calendarList().list().execute()
             calendars = calendar_list.get('items', [])
@@ -219,11 +422,11 @@ def shareCalendars():
                 dbCalendar = loadCalendar('googleCalendarId', calendar['id'])
 
                 if dbCalendar == None:
-                    logging.warning(f"Calendar ID: {calendar['id']} not found in database")
+                    logging.warning("Calendar ID: %s not found in database", calendar['id'])
                     continue
 
                 if dbCalendar['isShared'] == 1:
-                    logging.debug(f"Calendar ID: {calendar['id']} already shared")
+                    logging.debug("Calendar ID: %s already shared", calendar['id'])
                     continue
 
                 calendar_id = calendar['id']
@@ -237,7 +440,7 @@ def shareCalendars():
                 }
                 
                 service.acl().insert(calendarId=calendar_id, body=rule).execute()
-                logging.info(f"Shared calendar ID: {calendar_id} with {PERSONALEMAIL}")
+                logging.info("Shared calendar ID: %s with %s", calendar_id, PERSONALEMAIL)
                 updateCalendarDBByGoogleId(calendar_id, 'isShared', 1)
         except Exception as e:
             logging.error(f"An error occurred: {e}")
@@ -246,62 +449,34 @@ def bulkDeleteCalendarEvents(games, clubCalendarId=None):
     service = getGoogleService()
     results = []
     gameMap = {}
-    successful_requests = set()
-    request_id_to_callback = {}
-
-    def callback(request_id, response, exception):
-        if exception is not None:
-            logMessage = f"An error occurred while deleting an event: {exception}"
-            logging.error(logMessage)
-            sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-        else:
-            results.append({'request_id': request_id, 'status': 'success', 'response': response})
-            game = gameMap[request_id]
-            field = 'teamCalendarEventId' if clubCalendarId is None else 'clubCalendarEventId'
-            updateGameDB(game['id'], field, None)
-            successful_requests.add(request_id)
-
-    # Group games by calendar ID
-    calendar_batches = {}
+    batchRequests = []
+    field = 'teamCalendarEventId' if clubCalendarId is None else 'clubCalendarEventId'
 
     for game in games:
         # Generate a unique request_id for each game
         request_id = str(uuid.uuid4())
         gameMap[request_id] = game
-        logging.debug(f"Request ID: {request_id} for game ID: {game['id']}")
+        logging.debug("Request ID: %s for game ID: %s", request_id, game['id'])
 
         calendar_id = game['teamCalendarId'] if clubCalendarId is None else clubCalendarId
+        batchRequests.append((request_id, service.events().delete(calendarId=calendar_id, eventId=game[field])))
+
+    def afterBatch(chunk, outcomes):
+        eventIdUpdates = []
+        for request_id, outcome in outcomes.items():
+            # An event that is already gone does not have to be deleted anymore
+            if outcome['exception'] is not None and outcome['error']['status'] not in (404, 410):
+                logging.error("An error occurred while deleting an event for game %s: %s", gameMap[request_id]['id'], outcome['exception'])
+                results.append(createFailedResult(request_id, gameMap[request_id], outcome))
+                continue
 
-        if calendar_id not in calendar_batches:
-            calendar_batches[calendar_id] = service.new_batch_http_request()
-
-        if clubCalendarId is None:
-            calendar_batches[calendar_id].add(service.events().delete(calendarId=game['teamCalendarId'], eventId=game['teamCalendarEventId']), callback=callback, request_id=request_id)
-        else:
-            calendar_batches[calendar_id].add(service.events().delete(calendarId=clubCalendarId, eventId=game['clubCalendarEventId']), callback=callback, request_id=request_id)
+            results.append({'request_id': request_id, 'status': 'success', 'response': outcome['response']})
+            eventIdUpdates.append({'gameId': gameMap[request_id]['id'], 'eventId': None, 'fingerprint': None})
 
-        request_id_to_callback[request_id] = callback
+        flushEventIds(field, eventIdUpdates)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def execute_batch(batch, calendar_id):
-        try:
-            batch.execute()
-        except AttributeError as e:
-            logging.error(f"AttributeError during batch execution for calendar ID {calendar_id}: {e}")
-            raise
-
-    # Execute each batch request separately
-    for calendar_id, batch in calendar_batches.items():
-        try:
-            execute_batch(batch, calendar_id)
-            # Remove successful requests from the batch
-            for request_id in list(request_id_to_callback.keys()):
-                if request_id in successful_requests:
-                    del request_id_to_callback[request_id]
-        except Exception as e:
-            logMessage = f"Batch execution failed for calendar ID {calendar_id}: {e}"
-            logging.error(logMessage)
-            sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+    with metrics.span('executeBatches', operation='delete', calendar='team' if clubCalendarId is None else 'club'):
+        executeBatches(batchRequests, afterBatch=afterBatch)
 
     return results
 
@@ -309,120 +484,299 @@ def bulkDeleteCalendarEvents(games, clubCalendarId=None):
 
 #region Games
 
-def updateGames(club=None):
-    if club is None:
-        logMessage = "No club provided"
-        logging.error(logMessage)
-        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-        return
-
+def updateAllGames(clubs):
+    # Fetch all clubs concurrently, the DB writes happen here in the order of PROBASKETCLUBS
+    # A game listed by two clubs is then always stored with the settings of the later one
+    gameCounts = createGameCounts()
+    migrateGameDB()
+    getHttpSession()
+    # The cache is read here, so the workers only do HTTP
+    cacheEntries = {club['clubId']: loadFetchCache(club['clubId']) for club in clubs}
+    with ThreadPoolExecutor(max_workers=max(1, SCRAPECONCURRENCY)) as executor:
+        futures = [(club, executor.submit(logpipeline.bind(fetchClubGames, clubId=club['clubId']), club, cacheEntries[club['clubId']])) for club in clubs]
+        for club, future in futures:
+            fetched = future.result()
+            if fetched is not None:
+                with logpipeline.context(clubId=club['clubId']):
+                    addGameCounts(gameCounts, storeClubGames(club, fetched))
+
+    logging.info(f"Games inserted: {gameCounts['inserted']}, changed: {gameCounts['changed']}, untouched: {gameCounts['untouched']}")
+    return gameCounts
+
+def createGameCounts():
+    return {'inserted': 0, 'changed': 0, 'untouched': 0}
+
+def addGameCounts(total, counts):
+    for key in total:
+        total[key] += counts[key]
+
+httpSession = None
+# Shared by the clubs and their pages, so Basketplan never gets more than SCRAPECONCURRENCY requests at once
+basketplanRequests = threading.BoundedSemaphore(max(1, SCRAPECONCURRENCY))
+
+def getHttpSession():
+    global httpSession
+    if httpSession is None:
+        # One keep-alive connection pool shared by all scraping workers
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, SCRAPECONCURRENCY))
+        httpSession = requests.Session()
+        httpSession.mount('https://', adapter)
+        httpSession.mount('http://', adapter)
+    return httpSession
+
+def fetchClubGames(club, cacheEntry=None):
     logging.debug(f"Updating games for club: {club}")
 
+    fetchStart, fetchEnd, fullFetch = getFetchWindow(cacheEntry)
+    fullFetchedAt = int(time.time()) if fullFetch else cacheEntry['fullFetchedAt']
+    logging.debug("Fetching games of club %s from %s to %s%s", club['clubId'], fetchStart, fetchEnd, " (whole season)" if fullFetch else "")
+
     url = CLUBGAMESURL
     data = {
         'actionType': 'searchGames',
-        'from': '01.07.24',
         'federationId': '10',
         'clubId': club['clubId'],
-        'maxResult': '500'
+        'maxResult': str(MAXRESULTS)
     }
     params = {
         'perspective': 'de_default'
     }
+    dateRanges = splitDateRange(fetchStart, fetchEnd, FETCHPAGEDAYS)
+
+    # The club settings are part of the key, since they change what is parsed from the same page
+    # The dates are not, the window moves every day and the cached digests and validators still describe the last answer
+    requestKey = createDigest({'url': url, 'data': data, 'params': params, 'club': club, 'fullFetch': fullFetch})
+    if cacheEntry != None and cacheEntry['requestKey'] != requestKey:
+        cacheEntry = None
+
+    # Only a single page can be requested conditionally, the pages of a split request are always fetched
+    headers = {}
+    unchangedDigest = None
+    if cacheEntry != None and len(dateRanges) == 1:
+        if cacheEntry['etag']:
+            headers['If-None-Match'] = cacheEntry['etag']
+        if cacheEntry['lastModified']:
+            headers['If-Modified-Since'] = cacheEntry['lastModified']
+        unchangedDigest = cacheEntry['contentDigest']
 
     try:
-        response = requests.post(url, data=data, params=params)
-
-        # Check if the request was successful
-        if response.status_code == 200:
-            # Parse the HTML response
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find the table with the game data
-            table = soup.select_one('#body table.forms')
-            
-            # Extract specific game data from the table rows, skipping the first two rows
-            gamesList = []
-            rows = table.find_all('tr')[2:]  # Skip the first two rows
-            for row in rows:
-                cells = row.find_all('td')
-
-                league = cells[3].text.strip()
-                if not club['includeAll'] and league not in club['includeLeagues']:
-                    continue
+        pages = fetchGamePages(url, data, params, dateRanges, headers, unchangedDigest)
+    except requests.RequestException as req_error:
+        logMessage = f"Request error: {req_error}"
+        logging.error(logMessage)
+        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+        return None
+    except Exception as e:
+        # The pages are parsed while fetching, a page that can not be parsed only skips this club
+        logMessage = f"An unexpected error occurred: {e}"
+        logging.error(logMessage)
+        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+        return None
 
-                if club['combineLeagues'] != None:
-                    for combine in club['combineLeagues']:
-                        if league == combine['combine']:
-                            league = combine['into']
-
-                # Set locale to German
-                locale.setlocale(locale.LC_TIME, 'de_DE.UTF-8')
-                date = cells[0].text.strip()
-                dateObj = None
-                if date != '':
-                    # format: Fr 01.07.24 20:00
-                    dateObj = datetime.datetime.strptime(date, '%a %d.%m.%y %H:%M')
-                    dateObj = pytz.timezone('Europe/Zurich').localize(dateObj)
-
-                # @TODO: Result ist not being formatted correctly, since it has whitespaces in it, non-breaking and not used further though
-                gameData = {
-                    'date': dateObj,
-                    'league': league,
-                    'id': cells[5].text.strip(),
-                    'gym': cells[6].text.strip(),
-                    'homeTeam': cells[7].text.strip(),
-                    'awayTeam': cells[8].text.strip(),
-                    'result': cells[11].text.strip(),
-                }
-                gamesList.append(gameData)
-            
-        else:
-            logMessage = f"Failed to retrieve data from Basketplan. Status code: {response.status_code}"
-            logging.error(logMessage)
-            sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-            return
+    if pages is None:
+        return None
+
+    singlePage = pages[0] if len(pages) == 1 else None
+    fetched = {
+        'clubId': club['clubId'],
+        'requestKey': requestKey,
+        'cacheEntry': cacheEntry,
+        'fullFetchedAt': fullFetchedAt,
+        'rows': None,
+        'contentDigest': singlePage['contentDigest'] if singlePage else createDigest([page['contentDigest'] for page in pages]),
+        'etag': singlePage['etag'] if singlePage else None,
+        'lastModified': singlePage['lastModified'] if singlePage else None,
+    }
+
+    if singlePage and singlePage['status'] == 304 and cacheEntry != None:
+        logging.info(f"Fetch cache hit for club {club['clubId']}: page not modified")
+        return fetched
+
+    if cacheEntry != None and fetched['contentDigest'] == cacheEntry['contentDigest']:
+        logging.info(f"Fetch cache hit for club {club['clubId']}: page unchanged")
+        return fetched
+
+    # A game is only taken once, even if Basketplan lists it on two pages
+    rows = {}
+    for page in pages:
+        for row in page['rows']:
+            rows.setdefault(row['id'], row)
+    fetched['rows'] = list(rows.values())
+
+    return fetched
+
+def fetchGamePages(url, data, params, dateRanges, headers, unchangedDigest=None):
+    # The date ranges are fetched concurrently, a range that reaches the result limit is split in two and both halves are fetched
+    pages = {}
+    with ThreadPoolExecutor(max_workers=max(1, SCRAPECONCURRENCY)) as executor:
+        # Every page runs with the log fields of the club
+        futures = {executor.submit(logpipeline.bind(fetchGamePage), url, data, params, dateRange, headers, unchangedDigest): dateRange for dateRange in dateRanges}
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                dateRange = futures.pop(future)
+                page = future.result()
+
+                if page['status'] not in (200, 304):
+                    logMessage = f"Failed to retrieve data from Basketplan. Status code: {page['status']}"
+                    logging.error(logMessage)
+                    sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+                    for pendingFuture in futures:
+                        pendingFuture.cancel()
+                    return None
+
+                if page['rows'] != None and len(page['rows']) >= MAXRESULTS:
+                    halves = splitDateRangeInHalf(dateRange)
+                    if halves != None:
+                        logging.info("Result limit reached for club %s from %s to %s, fetching the range in two parts", data['clubId'], dateRange[0], dateRange[1])
+                        for half in halves:
+                            futures[executor.submit(logpipeline.bind(fetchGamePage), url, data, params, half, {})] = half
+                        continue
+
+                    logMessage = f"More than {MAXRESULTS} games of club {data['clubId']} on {dateRange[0]}, some of them may be missing"
+                    logging.warning(logMessage)
+                    sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+
+                pages[dateRange] = page
+
+    return [pages[dateRange] for dateRange in sorted(pages)]
+
+def fetchGamePage(url, data, params, dateRange, headers, unchangedDigest=None):
+    # Basketplan includes both dates of the range
+    pageData = dict(data, **{'from': formatBasketplanDate(dateRange[0]), 'to': formatBasketplanDate(dateRange[1])})
+
+    with basketplanRequests, metrics.span('scrape', club=data['clubId']):
+        response = getHttpSession().post(url, data=pageData, params=params, headers=headers, timeout=REQUESTTIMEOUT)
+
+    metrics.increment('http_requests', target='basketplan')
+    metrics.increment('bytes', len(response.request.body or ''), target='basketplan', direction='sent')
+    metrics.increment('bytes', len(response.content), target='basketplan', direction='received')
+
+    page = {
+        'status': response.status_code,
+        'etag': response.headers.get('ETag'),
+        'lastModified': response.headers.get('Last-Modified'),
+        'contentDigest': None,
+        'rows': None,
+    }
+    if response.status_code == 200:
+        page['contentDigest'] = hashlib.sha256(response.content).hexdigest()
+        if page['contentDigest'] != unchangedDigest:
+            # Parsed right away, so only the rows of a page are kept and not its HTML
+            with metrics.span('parse', club=data['clubId']):
+                page['rows'] = parseGameRows(response.text, PARSERBACKEND)
+
+    return page
+
+def splitDateRange(start, end, days):
+    if days == None:
+        return [(start, end)]
+
+    dateRanges = []
+    while start <= end:
+        rangeEnd = min(start + datetime.timedelta(days=days - 1), end)
+        dateRanges.append((start, rangeEnd))
+        start = rangeEnd + datetime.timedelta(days=1)
+    return dateRanges
+
+def splitDateRangeInHalf(dateRange):
+    start, end = dateRange
+    if start == end:
+        return None
 
-        if not os.path.exists(GAMEDBPATH):
-            try:
-                conn = sqlite3.connect(GAMEDBPATH)
-                createGameTable(conn)
-            except sqlite3.Error as error:
-                logMessage = f"An error occured while creating Game Table: {error}"
-                logging.error(logMessage)
-                sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-            finally:
-                if conn:
-                    conn.close()
+    middle = start + (end - start) // 2
+    return [(start, middle), (middle + datetime.timedelta(days=1), end)]
+
+def getSeasonStart(today):
+    seasonStart = datetime.date(today.year, SEASONSTARTMONTH, 1)
+    if today < seasonStart:
+        seasonStart = seasonStart.replace(year=today.year - 1)
+    return seasonStart
+
+def getFetchWindow(cacheEntry, now=None):
+    # Returns the first and last day to fetch and if it is the whole season
+    # Games played before the window keep their stored state, the regular full fetch still picks up late changes to them
+    if now is None:
+        now = time.time()
+
+    today = datetime.datetime.fromtimestamp(now, ZURICH).date()
+    seasonStart = getSeasonStart(today)
+    seasonEnd = seasonStart.replace(year=seasonStart.year + 1) - datetime.timedelta(days=1)
+    if FETCHWINDOWDAYS == None:
+        return seasonStart, seasonEnd, True
+
+    fullFetchedAt = cacheEntry['fullFetchedAt'] if cacheEntry != None else None
+    seasonStartTime = toEpoch(ZURICH.localize(datetime.datetime.combine(seasonStart, datetime.time())))
+    if fullFetchedAt == None or fullFetchedAt < seasonStartTime or now - fullFetchedAt >= FULLFETCHINTERVAL * 3600:
+        return seasonStart, seasonEnd, True
+
+    return max(seasonStart, today - datetime.timedelta(days=FETCHWINDOWDAYS)), seasonEnd, False
+
+def parseClubGames(club, html):
+    return createClubGames(club, parseGameRows(html, PARSERBACKEND))
+
+def createClubGames(club, rows):
+    # Keep the game rows of the configured leagues
+    gamesList = []
+    for row in rows:
+        league = row['league']
+        if not club['includeAll'] and league not in club['includeLeagues']:
+            continue
 
-        conn = sqlite3.connect(GAMEDBPATH)
-        c = conn.cursor()
+        if club['combineLeagues'] != None:
+            for combine in club['combineLeagues']:
+                if league == combine['combine']:
+                    league = combine['into']
+
+        # Stored as UTC epoch seconds, which compare and sort without parsing
+        dateObj = parseBasketplanDate(row['date'])
+
+        # @TODO: Result ist not being formatted correctly, since it has whitespaces in it, non-breaking and not used further though
+        gameData = {
+            'startTime': toEpoch(dateObj) if dateObj != None else None,
+            'league': league,
+            'id': row['id'],
+            'gym': row['gym'],
+            'homeTeam': row['homeTeam'],
+            'awayTeam': row['awayTeam'],
+            'result': row['result'],
+        }
+        gamesList.append(gameData)
 
-        for game in gamesList:
+    return gamesList
 
-            c.execute('''
-                INSERT OR IGNORE INTO game (id, date, league, homeTeam, awayTeam, gym, result)
-                VALUES (:id, :date, :league, :homeTeam, :awayTeam, :gym, :result)
-            ''', game)
+def storeClubGames(club, fetched):
+    gameCounts = createGameCounts()
+    try:
+        if fetched['rows'] is None:
+            # The page is the one the cache entry was stored for, so are its games
+            gameCounts['untouched'] = fetched['cacheEntry']['gameCount'] or 0
+            return gameCounts
 
-            c.execute('''
-                UPDATE game
-                SET date = :date,
-                    league = :league,
-                    homeTeam = :homeTeam,
-                    awayTeam = :awayTeam,
-                    gym = :gym,
-                    result = :result
-                WHERE id = :id
-            ''', game)
-
-        conn.commit()
-        logging.debug("Changes committed")
+        gamesList = createClubGames(club, fetched['rows'])
+        fetched['gamesDigest'] = createDigest(gamesList)
+        fetched['gameCount'] = len(gamesList)
+        # Kept with the cache, so the daemon knows when the club plays without parsing the page again
+        fetched['gameDates'] = json.dumps(sorted(game['startTime'] for game in gamesList if game['startTime'] != None))
+
+        cacheEntry = fetched['cacheEntry']
+        if cacheEntry != None and fetched['gamesDigest'] == cacheEntry['gamesDigest']:
+            logging.info(f"Fetch cache hit for club {club['clubId']}: games unchanged")
+            gameCounts['untouched'] = len(gamesList)
+            with transaction(GAMEDBPATH) as c:
+                saveFetchCache(c, fetched)
+            return gameCounts
+
+        logging.info(f"Fetch cache miss for club {club['clubId']}")
+
+        with metrics.span('upsert', club=club['clubId']), transaction(GAMEDBPATH) as c:
+            gameCounts = upsertGames(c, gamesList)
+
+            # Stored in the same transaction, so the cache never runs ahead of the games
+            saveFetchCache(c, fetched)
+
+        logging.debug(f"Changes committed for club {club['clubId']}: {gameCounts}")
 
-    except requests.RequestException as req_error:
-        logMessage = f"Request error: {req_error}"
-        logging.error(logMessage)
-        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
     except sqlite3.Error as sql_error:
         logMessage = f"SQLite error: {sql_error}"
         logging.error(logMessage)
@@ -431,75 +785,137 @@ def updateGames(club=None):
         logMessage = f"An unexpected error occurred: {e}"
         logging.error(logMessage)
         sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-    finally:
-        conn.close()
-        logging.debug(f"Database connection closed for club {club['clubId']}")
 
-def checkGames():
+    return gameCounts
+
+def upsertGames(c, gamesList):
+    # New rows get a rowid above the current last one and updated rows keep theirs, so the inserts are counted without scanning the table
+    c.execute('''
+        SELECT COALESCE(MAX(rowid), 0) FROM game
+    ''')
+    lastRowid = c.fetchone()[0]
+
+    # Existing rows are only rewritten if one of the scraped columns actually differs
+    changesBefore = c.connection.total_changes
+    c.executemany('''
+        INSERT INTO game (id, startTime, league, homeTeam, awayTeam, gym, result)
+        VALUES (:id, :startTime, :league, :homeTeam, :awayTeam, :gym, :result)
+        ON CONFLICT(id) DO UPDATE
+        SET startTime = excluded.startTime,
+            league = excluded.league,
+            homeTeam = excluded.homeTeam,
+            awayTeam = excluded.awayTeam,
+            gym = excluded.gym,
+            result = excluded.result
+        WHERE game.startTime IS NOT excluded.startTime
+            OR game.league IS NOT excluded.league
+            OR game.homeTeam IS NOT excluded.homeTeam
+            OR game.awayTeam IS NOT excluded.awayTeam
+            OR game.gym IS NOT excluded.gym
+            OR game.result IS NOT excluded.result
+    ''', gamesList)
+    writtenRows = c.connection.total_changes - changesBefore
+
+    c.execute('''
+        SELECT COUNT(*) FROM game
+        WHERE rowid > :lastRowid
+    ''', {'lastRowid': lastRowid})
+    inserted = c.fetchone()[0]
+
+    return {
+        'inserted': inserted,
+        'changed': writtenRows - inserted,
+        'untouched': len(gamesList) - writtenRows,
+    }
+
+def loadFetchCache(clubId):
+    if not os.path.exists(GAMEDBPATH):
+        return None
+
+    try:
+        c = getConnection(GAMEDBPATH).execute('''
+            SELECT * FROM fetchCache
+            WHERE clubId = :clubId
+        ''', {'clubId': clubId})
+
+        cacheEntry = c.fetchone()
+        return dict(cacheEntry) if cacheEntry else None
+    except sqlite3.Error as error:
+        logging.warning(f"Unable to load fetch cache for club {clubId}: {error}")
+        return None
+
+def saveFetchCache(c, fetched):
+    c.execute('''
+        INSERT OR REPLACE INTO fetchCache (clubId, requestKey, contentDigest, gamesDigest, etag, lastModified, fetchedAt, gameDates, fullFetchedAt, gameCount)
+        VALUES (:clubId, :requestKey, :contentDigest, :gamesDigest, :etag, :lastModified, :fetchedAt, :gameDates, :fullFetchedAt, :gameCount)
+    ''', {
+        'clubId': fetched['clubId'],
+        'requestKey': fetched['requestKey'],
+        'contentDigest': fetched['contentDigest'],
+        'gamesDigest': fetched['gamesDigest'],
+        'etag': fetched['etag'],
+        'lastModified': fetched['lastModified'],
+        'fetchedAt': int(time.time()),
+        'gameDates': fetched.get('gameDates'),
+        'fullFetchedAt': fetched['fullFetchedAt'],
+        'gameCount': fetched.get('gameCount'),
+    })
+
+def loadClubGameDates(clubId):
+    cacheEntry = loadFetchCache(clubId)
+    if cacheEntry == None or not cacheEntry['gameDates']:
+        return []
+
+    return [fromEpoch(startTime) for startTime in json.loads(cacheEntry['gameDates'])]
+
+def checkGames(gameCounts=None):
+    migrateGameDB()
+    recoverEventJournal()
+    assignTeamCalendars()
     loadedGames = loadGames() or []
     loadedCalendars = loadCalendars() or []
-    calendarEvents = fetchCalendarEvents(loadedCalendars) or []
-    clubCalendarId = loadCalendar('isClubCalendar', 1)['googleCalendarId']
-    
-    createdClubGamesCount = 0
-    updatedClubGamesCount = 0
-    unchangedClubGamesCount = 0
-    createdTeamGamesCount = 0
-    updatedTeamGamesCount = 0
-    unchangedTeamGamesCount = 0
-    noDateGamesCount = 0
+
+    # Events are only read from Google for the periodic drift check, otherwise the fingerprints decide
+    driftCheckCalendars = [calendar for calendar in loadedCalendars if isDriftCheckDue(calendar)]
+    with metrics.span('fetchEvents'):
+        calendarEvents = fetchCalendarEvents(driftCheckCalendars) if driftCheckCalendars else {}
+    clubCalendar = next((calendar for calendar in loadedCalendars if calendar['isClubCalendar']), None)
+    if clubCalendar == None:
+        logMessage = "Club calendar not found"
+        logging.error(logMessage)
+        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+        return
+    clubCalendarId = clubCalendar['googleCalendarId']
 
     logging.info(f"Total Calendars loaded: {len(loadedCalendars)}")
+    logging.info(f"Calendars checked for drift: {len(calendarEvents)}")
     logging.info(f"Total Games loaded: {len(loadedGames)}")
-    logging.info(f"Total Events loaded: {len(calendarEvents)}")
-
-    clubGamesToCreate = []
-    clubGamesToUpdate = []
-    teamGamesToCreate = []
-    teamGamesToUpdate = []
-    gamesToDelete = []
+    logging.info(f"Total Events loaded: {sum(len(events) for events in calendarEvents.values())}")
 
+    gamesToCheck = []
     for game in loadedGames:
-        if game['teamCalendarId'] == None:
-            calendar = checkCalendarExists(game['league'])
-            if calendar != None:
-                updateGameDB(game['id'], 'teamCalendarId', calendar['googleCalendarId'])
-                game['teamCalendarId'] = calendar['googleCalendarId']
-            else:
-                logging.warning(f"Calendar for league {game['league']} not found")
-                continue
-
-        if game['date'] == None or game['date'] == '':
-            if game['clubCalendarEventId'] != None or game['teamCalendarEventId'] != None:
-                logging.warning(f"Game with id {game['id']} has no date set. Unable to create or update Calendar Event. Marking for deletion.")
-                noDateGamesCount += 1
-                gamesToDelete.append(game)
-            else:
-                logging.warning(f"Game with id {game['id']} has no date set. No Event exists for this game.")
-                unchangedClubGamesCount += 1
+        # Joined by loadGames, missing if the game has no team calendar or it is not in the calendar database
+        if game['teamCalendarLeague'] == None:
+            logging.warning("Calendar for league %s not found", game['league'])
             continue
+        gamesToCheck.append(game)
 
-        if game['clubCalendarEventId'] == None:
-            clubGamesToCreate.append(game)
-        else:
-            for event in calendarEvents:
-                if event['id'] == game['clubCalendarEventId']:
-                    if not compareGame(game, event):
-                        clubGamesToUpdate.append(game)
-                    else:
-                        unchangedClubGamesCount += 1
-                    break
+    with metrics.span('reconcile'):
+        reconciliation = reconcileGames(gamesToCheck, calendarEvents, clubCalendarId)
 
-        if game['teamCalendarEventId'] == None:
-            teamGamesToCreate.append(game)
-        else:
-            for event in calendarEvents:
-                if event['id'] == game['teamCalendarEventId']:
-                    if not compareGame(game, event):
-                        teamGamesToUpdate.append(game)
-                    else:
-                        unchangedTeamGamesCount += 1
-                    break
+    clubGamesToCreate = reconciliation['club']['create']
+    clubGamesToUpdate = reconciliation['club']['update']
+    teamGamesToCreate = reconciliation['team']['create']
+    teamGamesToUpdate = reconciliation['team']['update']
+    gamesToDelete = reconciliation['delete']
+
+    createdClubGamesCount = 0
+    updatedClubGamesCount = 0
+    unchangedClubGamesCount = len(reconciliation['club']['unchanged']) + len(reconciliation['noEvent'])
+    createdTeamGamesCount = 0
+    updatedTeamGamesCount = 0
+    unchangedTeamGamesCount = len(reconciliation['team']['unchanged'])
+    noDateGamesCount = len(gamesToDelete)
 
     logging.debug(f"Club games to create: {len(clubGamesToCreate)}")
     logging.debug(f"Club games to update: {len(clubGamesToUpdate)}")
@@ -516,18 +932,28 @@ def checkGames():
 
     # Bulk delete calendar events
     # club
-    deleteResults = bulkDeleteCalendarEvents(gamesToDelete, clubCalendarId)
+    clubDeleteResults = bulkDeleteCalendarEvents(gamesToDelete, clubCalendarId)
     # team
     deleteResults = bulkDeleteCalendarEvents(gamesToDelete)
 
     # Update counters based on results
-    createdClubGamesCount += len(clubCreateResults)
-    updatedClubGamesCount += len(clubUpdateResults)
-    createdTeamGamesCount += len(teamCreateResults)
-    updatedTeamGamesCount += len(teamUpdateResults)
-    deletedGamesCount = len(deleteResults)
-
-    logMessages = [
+    createdClubGamesCount += countSuccessfulResults(clubCreateResults)
+    updatedClubGamesCount += countSuccessfulResults(clubUpdateResults)
+    createdTeamGamesCount += countSuccessfulResults(teamCreateResults)
+    updatedTeamGamesCount += countSuccessfulResults(teamUpdateResults)
+    deletedGamesCount = countSuccessfulResults(deleteResults)
+
+    failedResults = [result for results in (clubCreateResults, clubUpdateResults, teamCreateResults, teamUpdateResults, clubDeleteResults, deleteResults) for result in results if result['status'] == 'failed']
+
+    logMessages = []
+    if gameCounts != None:
+        logMessages += [
+            f"Inserted Games: {gameCounts['inserted']}",
+            f"Changed Games: {gameCounts['changed']}",
+            f"Untouched Games: {gameCounts['untouched']}",
+        ]
+
+    logMessages += [
         f"Games without date: {noDateGamesCount}",
         f"Deleted Games: {deletedGamesCount}",
         f"Created Club-Calendar Events: {createdClubGamesCount}",
@@ -536,6 +962,9 @@ def checkGames():
         f"Created Team-Calendar Events: {createdTeamGamesCount}",
         f"Updated Team-Calendar Events: {updatedTeamGamesCount}",
         f"Unchanged Team-Calendar Events: {unchangedTeamGamesCount}",
+        f"Events not found in Calendars: {len(reconciliation['missing'])}",
+        f"Unmatched Calendar Events: {len(reconciliation['unmatched'])}",
+        f"Failed Calendar Requests: {len(failedResults)}",
     ]
 
     notification = ''
@@ -547,23 +976,110 @@ def checkGames():
     
     sendNotification(title, notification)
 
+    if failedResults:
+        sendNotification(CLUBNAMESHORT + ": Gameplan Error", createFailureReport(failedResults))
+
+def countSuccessfulResults(results):
+    return len([result for result in results if result['status'] == 'success'])
+
+def createFailureReport(failedResults):
+    # One report for all requests that failed permanently, grouped by error
+    errors = {}
+    for result in failedResults:
+        key = (result['error']['status'], result['error']['reason'])
+        errors.setdefault(key, []).append(result['gameId'])
+
+    lines = [f"{len(failedResults)} calendar requests failed permanently"]
+    for (status, reason), gameIds in errors.items():
+        lines.append(f"{status} {reason}: {len(gameIds)} games ({', '.join(gameIds[:10])}{', ...' if len(gameIds) > 10 else ''})")
+
+    return '\n'.join(lines)
+
+def isDriftCheckDue(calendar):
+    lastEventCheck = calendar.get('lastEventCheck')
+    return lastEventCheck is None or time.time() - lastEventCheck >= DRIFTCHECKINTERVAL * 3600
+
+def reconcileGames(games, eventsByCalendar, clubCalendarId):
+    # Index the fetched events by id once per calendar, so every game is a dict lookup instead of a scan
+    eventIndex = {}
+    for calendarId, events in eventsByCalendar.items():
+        eventIndex[calendarId] = {event['id']: event for event in events}
+
+    reconciliation = {
+        'club': {'create': [], 'update': [], 'unchanged': []},
+        'team': {'create': [], 'update': [], 'unchanged': []},
+        'delete': [],
+        'noEvent': [],
+        'missing': [],
+        'unmatched': [],
+    }
+    matchedEvents = set()
+
+    for game in games:
+        if game['startTime'] == None:
+            if game['clubCalendarEventId'] != None or game['teamCalendarEventId'] != None:
+                logging.warning("Game with id %s has no date set. Unable to create or update Calendar Event. Marking for deletion.", game['id'])
+                reconciliation['delete'].append(game)
+            else:
+                logging.warning("Game with id %s has no date set. No Event exists for this game.", game['id'])
+                reconciliation['noEvent'].append(game)
+            continue
+
+        fingerprint = createEventFingerprint(createEventBody(game))
+        targets = (
+            ('club', clubCalendarId, game['clubCalendarEventId'], game['clubCalendarFingerprint']),
+            ('team', game['teamCalendarId'], game['teamCalendarEventId'], game['teamCalendarFingerprint']),
+        )
+        for target, calendarId, eventId, pushedFingerprint in targets:
+            if eventId == None:
+                reconciliation[target]['create'].append(game)
+                continue
+
+            # Without a drift check the last pushed fingerprint is compared with the current event body
+            if calendarId not in eventIndex:
+                if fingerprint != pushedFingerprint:
+                    reconciliation[target]['update'].append(game)
+                else:
+                    reconciliation[target]['unchanged'].append(game)
+                continue
+
+            event = eventIndex[calendarId].get(eventId)
+            if event == None:
+                # Deleted in Google, the event is created again and the new id replaces the stored one
+                logging.warning("Event %s of game with id %s not found in %s calendar %s, creating it again", eventId, game['id'], target, calendarId)
+                reconciliation['missing'].append((target, game))
+                reconciliation[target]['create'].append(game)
+                continue
+
+            matchedEvents.add((calendarId, eventId))
+            if not compareGame(game, event) or fingerprint != pushedFingerprint:
+                reconciliation[target]['update'].append(game)
+            else:
+                reconciliation[target]['unchanged'].append(game)
+
+    for calendarId, events in eventIndex.items():
+        for eventId, event in events.items():
+            if (calendarId, eventId) not in matchedEvents:
+                reconciliation['unmatched'].append(event)
+
+    if reconciliation['unmatched']:
+        logging.warning(f"{len(reconciliation['unmatched'])} calendar events could not be matched to a game")
+
+    return reconciliation
+
 def loadGames():
     try:
-        conn = sqlite3.connect(GAMEDBPATH)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute('''
-            SELECT * FROM game
-        ''')
+        with attachedDatabases(getConnection(GAMEDBPATH), CALENDARATTACHMENT) as conn:
+            games = conn.execute('''
+                SELECT game.*, calendar.league AS teamCalendarLeague FROM game
+                LEFT JOIN calendarDB.calendar AS calendar ON calendar.googleCalendarId = game.teamCalendarId
+            ''').fetchall()
 
-        games = c.fetchall()
         games = [dict(game) for game in games]
 
         if (DEBUG):
             games = games[:2]
 
-        conn.close()
         return games
     except sqlite3.Error as error:
         logMessage = f"An error occured: {error}"
@@ -571,117 +1087,166 @@ def loadGames():
         sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
         return []
 
-def updateGameDB(id, field, value):
+def assignTeamCalendars():
+    # One statement for all games without a team calendar, instead of a lookup and an update per game
     try:
-        conn = sqlite3.connect(GAMEDBPATH)
-        c = conn.cursor()
-        logging.debug(f"Attempting to update game with id {id}: Field {field} with value {value}")
+        with transaction(GAMEDBPATH, CALENDARATTACHMENT) as c:
+            c.execute('''
+                UPDATE game
+                SET teamCalendarId = calendar.googleCalendarId
+                FROM calendarDB.calendar AS calendar
+                WHERE game.teamCalendarId IS NULL
+                    AND calendar.league = game.league
+            ''')
 
-        query = f'''
-            UPDATE game
-            SET {field} = :value
-            WHERE id = :id
-        '''
-        c.execute(query, {'id': id, 'value': value})
+            logging.debug(f"Team calendars assigned: {c.rowcount}")
+    except sqlite3.Error as error:
+        logMessage = f"An error occured while assigning team calendars: {error}"
+        logging.error(logMessage)
+        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
 
-        logging.debug(f"Rows updated: {c.rowcount}")
+def flushEventIds(field, eventIdUpdates, answeredEventIds=()):
+    if not eventIdUpdates and not answeredEventIds:
+        return
 
-        conn.commit()
+    try:
+        with transaction(GAMEDBPATH) as c:
+            c.executemany(f'''
+                UPDATE game
+                SET {field} = :eventId,
+                    {FINGERPRINTFIELDS[field]} = :fingerprint
+                WHERE id = :gameId
+            ''', eventIdUpdates)
+
+            # Google answered these requests, so they do not need to be recovered anymore
+            if answeredEventIds:
+                c.executemany('''
+                    DELETE FROM eventJournal
+                    WHERE eventId = ?
+                ''', [(eventId,) for eventId in answeredEventIds])
+
+        logging.debug("Flushed %s event ids for field %s", len(eventIdUpdates), field)
     except sqlite3.Error as error:
-        logMessage = f"An error occured: {error}"
+        logMessage = f"An error occured while writing event ids: {error}"
         logging.error(logMessage)
         sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-    finally:
-        conn.close()
 
-def createGameTable(conn):
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE game (
-            id text PRIMARY KEY,
-            date DATETIME NULL,
-            league text,
-            homeTeam text,
-            awayTeam text,
-            gym text,
-            result text,
-            clubCalendarEventId text NULL,
-            teamCalendarEventId text NULL,
-            teamCalendarId text,
-            FOREIGN KEY (teamCalendarId) REFERENCES calendar(id)
-        )
-    ''')
+def journalEvents(journalEntries):
+    # Written before the batch is sent, so events Google creates are not lost if the process dies mid batch
+    if not journalEntries:
+        return
+
+    with transaction(GAMEDBPATH) as c:
+        c.executemany('''
+            INSERT OR REPLACE INTO eventJournal (eventId, gameId, field, calendarId)
+            VALUES (:eventId, :gameId, :field, :calendarId)
+        ''', journalEntries)
+
+def recoverEventJournal():
+    if not os.path.exists(GAMEDBPATH):
+        return
+
+    try:
+        journalEntries = [dict(entry) for entry in getConnection(GAMEDBPATH).execute('''
+            SELECT * FROM eventJournal
+        ''').fetchall()]
+    except sqlite3.Error as error:
+        logging.error(f"Unable to load event journal: {error}")
+        return
+
+    if not journalEntries:
+        return
+
+    logging.warning(f"Found {len(journalEntries)} events of an interrupted run, checking if they were created")
+    service = getGoogleService()
+    recoveredCount = 0
+
+    for entry in journalEntries:
+        try:
+            event = service.events().get(calendarId=entry['calendarId'], eventId=entry['eventId']).execute()
+            if event.get('status') != 'cancelled':
+                # The fingerprint is unknown, so the event is updated once on the next run
+                flushEventIds(entry['field'], [{'gameId': entry['gameId'], 'eventId': entry['eventId'], 'fingerprint': None}], [entry['eventId']])
+                recoveredCount += 1
+                continue
+        except HttpError as error:
+            # Keep the entry for the next run unless the event definitely does not exist
+            if error.resp.status not in (404, 410):
+                logging.error("Unable to check journaled event %s: %s", entry['eventId'], error)
+                continue
+
+        flushEventIds(entry['field'], [], [entry['eventId']])
+
+    logging.info(f"Recovered {recoveredCount} event ids from the event journal")
+
+def migrateGameDB():
+    # Creates the game database or brings an older one to the current schema, see schema.py
+    try:
+        migrateGameSchema(GAMEDBPATH)
+    except sqlite3.Error as error:
+        logMessage = f"An error occured while migrating the Game DB: {error}"
+        logging.error(logMessage)
+        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
 
 #endregion
 
 #region Calendars
 
 def updateCalendars():
-    leagues = findLeagues()
-    createCalendarDB(None, True)
+    migrateCalendarDB()
 
-    for league in leagues:
-        createCalendarDB(league['league'])
+    with metrics.span('provisionCalendars'):
+        leagues = findLeagues()
+        createCalendarDB(None, True)
 
-    shareCalendars()
+        for league in leagues:
+            createCalendarDB(league['league'])
 
-def createCalendarDB(league=None, isClubCalendar=False):
-    if not os.path.exists(CALENDARDBPATH):
-        try:
-            conn = sqlite3.connect(CALENDARDBPATH)
-            createCalendarTable(conn)
-        except sqlite3.Error as error:
-            logMessage = f"An error occured while creating Calendar Table: {error}"
-            logging.error(logMessage)
-            sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-        finally:
-            if conn:
-                conn.close()
+    with metrics.span('shareCalendars'):
+        shareCalendars()
 
+def migrateCalendarDB():
+    try:
+        migrateCalendarSchema(CALENDARDBPATH)
+    except sqlite3.Error as error:
+        logMessage = f"An error occured while migrating the Calendar DB: {error}"
+        logging.error(logMessage)
+        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+
+def createCalendarDB(league=None, isClubCalendar=False):
     if checkCalendarExists(league):
         return
     else:
         try:
             googleCalendarId = createGoogleCalendar(league)
-            conn = sqlite3.connect(CALENDARDBPATH)
-            c = conn.cursor()
 
             if (league == None):
                 league = 'club'
 
-            c.execute('''
-                INSERT INTO calendar (id, googleCalendarId, league, isClubCalendar)
-                VALUES (:id, :googleCalendarId, :league, :isClubCalendar)
-            ''', {
-                'id': league,
-                'googleCalendarId': googleCalendarId,
-                'league': league,
-                'isClubCalendar': isClubCalendar
-            })
-
-            conn.commit()
+            with transaction(CALENDARDBPATH) as c:
+                c.execute('''
+                    INSERT INTO calendar (id, googleCalendarId, league, isClubCalendar)
+                    VALUES (:id, :googleCalendarId, :league, :isClubCalendar)
+                ''', {
+                    'id': league,
+                    'googleCalendarId': googleCalendarId,
+                    'league': league,
+                    'isClubCalendar': isClubCalendar
+                })
         except sqlite3.Error as error:
             logMessage = f"An error occured: {error}"
             logging.error(logMessage)
             sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-        finally:
-            if conn:
-                conn.close()
 
 def loadCalendars():
     try:
-        conn = sqlite3.connect(CALENDARDBPATH)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute(f'''
+        c = getConnection(CALENDARDBPATH).execute('''
             SELECT * FROM calendar
         ''')
 
         calendars = c.fetchall()
         calendars = [dict(calendar) for calendar in calendars]
 
-        conn.close()
         return calendars
     except sqlite3.Error as error:
         logMessage = f"An error occured: {error}"
@@ -691,11 +1256,7 @@ def loadCalendars():
 
 def loadCalendar(field, value):
     try:
-        conn = sqlite3.connect(CALENDARDBPATH)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute(f'''
+        c = getConnection(CALENDARDBPATH).execute(f'''
             SELECT * FROM calendar
             WHERE {field} = :value
         ''', {'value': value})
@@ -703,7 +1264,6 @@ def loadCalendar(field, value):
         calendar = c.fetchone()
         calendar = dict(calendar)
 
-        conn.close()
         return calendar
     except sqlite3.Error as error:
         logMessage = f"An error occured: {error}"
@@ -713,24 +1273,21 @@ def loadCalendar(field, value):
 
 def checkCalendarExists(league = None):
     try:
-        conn = sqlite3.connect(CALENDARDBPATH)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
+        conn = getConnection(CALENDARDBPATH)
 
         if league != None:
-            c.execute('''
+            c = conn.execute('''
                 SELECT * FROM calendar
                 WHERE league = :league
             ''', {'league': league})
         else:
-            c.execute('''
+            c = conn.execute('''
                 SELECT * FROM calendar
                 WHERE isClubCalendar = 1
             ''')
 
         calendar = c.fetchone()
 
-        conn.close()
         return calendar
     except sqlite3.Error as error:
         logMessage = f"An error occured: {error}"
@@ -738,40 +1295,64 @@ def checkCalendarExists(league = None):
         sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
         return None
 
-def createCalendarTable(conn):
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE calendar (
-            id text PRIMARY KEY,
-            googleCalendarId text,
-            league text NULL,
-            isClubCalendar boolean,
-            isShared boolean DEFAULT 0
-        )
-    ''')
+def storeCalendarEvents(googleCalendarId, events, syncToken, fullSync):
+    try:
+        with transaction(CALENDARDBPATH) as c:
+            if fullSync:
+                c.execute('''
+                    DELETE FROM event
+                    WHERE googleCalendarId = ?
+                ''', (googleCalendarId,))
+
+            # Deleted events are part of an incremental sync with the status cancelled
+            c.executemany('''
+                DELETE FROM event
+                WHERE googleCalendarId = ? AND id = ?
+            ''', [(googleCalendarId, event['id']) for event in events if event.get('status') == 'cancelled'])
+
+            c.executemany('''
+                INSERT OR REPLACE INTO event (googleCalendarId, id, data)
+                VALUES (?, ?, ?)
+            ''', [(googleCalendarId, event['id'], json.dumps(event)) for event in events if event.get('status') != 'cancelled'])
+
+            c.execute('''
+                UPDATE calendar
+                SET syncToken = ?
+                WHERE googleCalendarId = ?
+            ''', (syncToken, googleCalendarId))
+
+        return loadCalendarEvents(googleCalendarId)
+    except sqlite3.Error as error:
+        logMessage = f"An error occured while storing events: {error}"
+        logging.error(logMessage)
+        sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
+        return None
+
+def loadCalendarEvents(googleCalendarId):
+    c = getConnection(CALENDARDBPATH).execute('''
+        SELECT data FROM event
+        WHERE googleCalendarId = ?
+    ''', (googleCalendarId,))
+
+    return [json.loads(event['data']) for event in c.fetchall()]
 
 def updateCalendarDBByGoogleId(id, field, value):
     try:
-        conn = sqlite3.connect(CALENDARDBPATH)
-        c = conn.cursor()
-        logging.debug(f"Attempting to update calendar with Google CalendarID {id}: Field {field} with value {value}")
-
-        query = f'''
-            UPDATE calendar
-            SET {field} = :value
-            WHERE googleCalendarId = :id
-        '''
-        c.execute(query, {'id': id, 'value': value})
+        with transaction(CALENDARDBPATH) as c:
+            logging.debug("Attempting to update calendar with Google CalendarID %s: Field %s with value %s", id, field, value)
 
-        logging.debug(f"Rows updated: {c.rowcount}")
+            query = f'''
+                UPDATE calendar
+                SET {field} = :value
+                WHERE googleCalendarId = :id
+            '''
+            c.execute(query, {'id': id, 'value': value})
 
-        conn.commit()
+            logging.debug("Rows updated: %s", c.rowcount)
     except sqlite3.Error as error:
         logMessage = f"An error occured: {error}"
         logging.error(logMessage)
         sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
-    finally:
-        conn.close()
 
 #endregion
 
@@ -779,18 +1360,13 @@ def updateCalendarDBByGoogleId(id, field, value):
 
 def findLeagues():
     try:
-        conn = sqlite3.connect(GAMEDBPATH)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute('''
+        c = getConnection(GAMEDBPATH).execute('''
             SELECT DISTINCT league FROM game
         ''')
 
         leagues = c.fetchall()
         leagues = [dict(league) for league in leagues]
 
-        conn.close()
         return leagues
     except sqlite3.Error as error:
         logMessage = f"An error occured: {error}"
@@ -798,54 +1374,41 @@ def findLeagues():
         sendNotification(CLUBNAMESHORT + ": Gameplan Error", logMessage)
         return []
 
+def acquireInstanceLock():
+    # The lock is held as long as the returned file stays open, the OS releases it if the process dies
+    lockFile = open(LOCKPATH, 'a')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lockFile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(lockFile.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lockFile.close()
+        logging.warning(f"Another instance is already running, lock file {LOCKPATH} is held")
+        return None
+
+    return lockFile
+
+def createDigest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
 def compareGame(game, calendarEvent):
-    gameDate = parser.parse(game['date'])
-    calendarEventDate = parser.parse(calendarEvent['start']['dateTime'])
-    
+    calendarEventStartTime = toEpoch(parseIsoDate(calendarEvent['start']['dateTime']))
+
     return (
-        gameDate == calendarEventDate and
+        game['startTime'] == calendarEventStartTime and
         game['gym'] == calendarEvent.get('location') and
         game['id'] in (calendarEvent.get('description') or '')
     )
 
 #endregion
 
-#region Notification
-
-def sendNotification(title, message):
-
-    if GOTIFYURL == None or GOTIFYTOKEN == None:
-        logging.warning("Gotify URL or Token not set. Skipping notification.")
-        return
-
-    # Payload for the notification
-    payload = {
-        "title": title,
-        "message": message,
-        "priority": 5
-    }
-
-    # Headers for the request
-    headers = {
-        "X-Gotify-Key": GOTIFYTOKEN
-    }
-
-    # Send the POST request to Gotify
-    response = requests.post(GOTIFYURL, json=payload, headers=headers)
-
-    # Check if the request was successful
-    if response.status_code == 200:
-        logging.debug("Notification sent successfully!")
-    else:
-        logging.error(f"Failed to send notification: {response.status_code} - {response.text}")
-
-#endregion
-
 #region Logging
 
 def logStartTime():
     global startTime
     startTime = time.time()
+    metrics.startRun()
     logging.info("------------------------------------------------")
     logging.info(f"Start time: {time.ctime(startTime)}")
 
@@ -856,24 +1419,14 @@ def logEndTime():
     logging.info(f"Duration: {duration} seconds")
     logging.info("Ending script ------------------------------------------------")
 
-def setupLogging():
-    if not os.path.exists(LOGPATH):
-        os.makedirs(LOGPATH)
-    
-    handler = TimedRotatingFileHandler(
-        filename=os.path.join(LOGPATH, 'app.log'),
-        when='midnight',
-        interval=1,
-        backupCount=30,
-        encoding='utf-8',
-    )
-    
-    formatter = logging.Formatter('[%(asctime)s] [%(levelname)s] [%(funcName)s] - %(message)s')
-    handler.setFormatter(formatter)
-    
-    logger = logging.getLogger()
-    logger.setLevel(LOGLEVEL)
-    logger.addHandler(handler)
+def writeRunReports():
+    try:
+        if RUNREPORTPATH:
+            metrics.writeRunReport(RUNREPORTPATH)
+        if PROMETHEUSTEXTFILEPATH:
+            metrics.writePrometheusTextfile(PROMETHEUSTEXTFILEPATH)
+    except OSError as error:
+        logging.error(f"Unable to write run report: {error}")
 
 #endregion
 
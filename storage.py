@@ -0,0 +1,113 @@
+# Keeps long-lived SQLite connections, so the helpers do not connect, commit and close on every call.
+# Every thread gets its own connection per database file, since sqlite3 connections are not shared between threads.
+import atexit
+import os
+import sqlite3
+import threading
+
+import metrics
+from contextlib import contextmanager
+
+# Prepared statements kept per connection by the sqlite3 module
+CACHEDSTATEMENTS = 256
+PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -8000',
+    'PRAGMA busy_timeout = 5000',
+]
+
+localConnections = threading.local()
+openConnections = []
+openConnectionsLock = threading.Lock()
+
+
+def getConnection(path):
+    connections = getattr(localConnections, 'connections', None)
+    if connections is None:
+        connections = localConnections.connections = {}
+
+    conn = connections.get(path)
+    if conn is None:
+        conn = openConnection(path)
+        connections[path] = conn
+        with openConnectionsLock:
+            openConnections.append(conn)
+
+    return conn
+
+@contextmanager
+def attachedDatabases(conn, attachments=None):
+    # Only attached while they are used, every transaction of the connection would otherwise also lock them
+    # Attaching and detaching is not possible inside a transaction, so it happens around it
+    attachments = attachments or {}
+    for name, path in attachments.items():
+        conn.execute(f'ATTACH DATABASE ? AS {name}', (os.path.abspath(path),))
+    try:
+        yield conn
+    finally:
+        for name in attachments:
+            conn.execute(f'DETACH DATABASE {name}')
+
+def openConnection(path):
+    # Autocommit mode, writes are grouped with transaction()
+    # The connection is only used by its own thread, check_same_thread is off so it can be closed on exit
+    conn = sqlite3.connect(path, isolation_level=None, cached_statements=CACHEDSTATEMENTS, check_same_thread=False, factory=CountingConnection)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+    return conn
+
+@contextmanager
+def transaction(path, attachments=None):
+    conn = getConnection(path)
+    with attachedDatabases(conn, attachments):
+        c = conn.cursor()
+        c.execute('BEGIN IMMEDIATE')
+        try:
+            yield c
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+def countStatements(parameters):
+    # executemany runs the statement once per parameter set
+    metrics.increment('sqlite_statements', len(parameters) if hasattr(parameters, '__len__') else 1)
+
+class CountingCursor(sqlite3.Cursor):
+    # Counts statements per call, a trace callback would have sqlite expand the SQL of every single execution
+
+    def execute(self, sql, parameters=()):
+        metrics.increment('sqlite_statements')
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        countStatements(parameters)
+        return super().executemany(sql, parameters)
+
+class CountingConnection(sqlite3.Connection):
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        metrics.increment('sqlite_statements')
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        countStatements(parameters)
+        return super().executemany(sql, parameters)
+
+def closeConnections():
+    with openConnectionsLock:
+        for conn in openConnections:
+            conn.close()
+        openConnections.clear()
+
+    localConnections.connections = {}
+
+atexit.register(closeConnections)
@@ -0,0 +1,59 @@
+# Compares the game table parser backends on the saved fixtures for throughput and peak memory
+# Usage: python benchmark-parser.py [iterations] [fixture ...]
+import sys
+import os
+import glob
+import time
+import tracemalloc
+
+# Add the parent directory to sys.path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from gameparser import parseGameRows, getAvailableBackends
+
+FIXTUREPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    fixtures = sys.argv[2:] or sorted(glob.glob(os.path.join(FIXTUREPATH, '*.html')))
+    if not fixtures:
+        print("No fixtures found, create them with generate-fixtures.py")
+        return
+
+    backends = getAvailableBackends()
+    print(f"{'fixture':<20} {'backend':<8} {'rows':>6} {'ms/page':>9} {'rows/s':>10} {'peak KiB':>9}")
+
+    for fixture in fixtures:
+        with open(fixture, encoding='utf-8') as file:
+            html = file.read()
+
+        expected = None
+        for backend in backends:
+            rows = parseGameRows(html, backend)
+            if expected is None:
+                expected = rows
+            elif rows != expected:
+                print(f"{os.path.basename(fixture)}: backend {backend} returned different rows")
+
+            duration = measureDuration(html, backend, iterations)
+            peak = measurePeakMemory(html, backend)
+            print(f"{os.path.basename(fixture):<20} {backend:<8} {len(rows):>6} {duration * 1000:>9.2f} {len(rows) / duration:>10.0f} {peak / 1024:>9.0f}")
+
+def measureDuration(html, backend, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parseGameRows(html, backend)
+    return (time.perf_counter() - start) / iterations
+
+def measurePeakMemory(html, backend):
+    # tracemalloc only sees Python allocations, the memory lxml uses in C for the tree is not included
+    tracemalloc.start()
+    parseGameRows(html, backend)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Measures the cold start of the gameplan.py commands and checks them against a time budget
+# Every command runs in a fresh interpreter with a temporary config, using the fake calendar backend, so nothing is sent to Google
+# Usage: python benchmark-startup.py [runs]
+# Exits with 1 if a command is over its budget or imports a module it should not need
+import sys
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+PACKAGEPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(PACKAGEPATH)
+
+from schema import migrateGameSchema, migrateCalendarSchema
+from storage import closeConnections, transaction
+
+# Median wall time in milliseconds on top of the start of a bare interpreter, so the budgets hold on slower machines as well
+STARTUPBUDGETS = {
+    '--help': 50,
+    'show-games': 100,
+    'show-calendars': 100,
+    'list-calendars': 700,
+}
+# Modules the commands that only read the databases must not import
+HEAVYMODULES = ['googleapiclient', 'google.auth', 'requests', 'lxml', 'bs4', 'dateutil', 'pytz', 'script']
+LIGHTCOMMANDS = ['--help', 'show-games', 'show-calendars']
+
+CONFIG = '''import logging
+DEBUG = False
+LOGLEVEL = logging.INFO
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
+LOGPATH = {path!r}
+GAMEDBPATH = {path!r} + '/game.db'
+CALENDARDBPATH = {path!r} + '/calendar.db'
+PROBASKETCLUBS = []
+CLUBNAME = 'Benchmark'
+CLUBNAMESHORT = 'BM'
+CLUBGAMESURL = 'http://localhost/'
+GOTIFYURL = None
+GOTIFYTOKEN = None
+SERVICEACCOUNTFILE = None
+PERSONALEMAIL = None
+CALENDARBACKEND = 'fake'
+'''
+
+BOOTSTRAP = '''import sys, runpy
+sys.path[:0] = [{configPath!r}, {packagePath!r}]
+sys.argv = ['gameplan.py'] + sys.argv[1:]
+runpy.run_path({gameplanPath!r}, run_name='__main__')
+'''
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    failed = False
+
+    with tempfile.TemporaryDirectory() as tempPath:
+        createEnvironment(tempPath)
+        bootstrap = BOOTSTRAP.format(configPath=tempPath, packagePath=PACKAGEPATH, gameplanPath=os.path.join(PACKAGEPATH, 'gameplan.py'))
+
+        interpreter = measure([sys.executable, '-c', 'pass'], runs)
+        print(f"{'command':<16} {'median ms':>10} {'budget ms':>10} {'modules':>8}")
+        print(f"{'(python)':<16} {interpreter:>10.0f}")
+
+        for command, budget in STARTUPBUDGETS.items():
+            duration = measure([sys.executable, '-c', bootstrap, command], runs)
+            modules = getImportedModules(bootstrap, command)
+            heavy = [module for module in HEAVYMODULES if module in modules] if command in LIGHTCOMMANDS else []
+
+            status = ''
+            if duration - interpreter > budget:
+                status = 'OVER BUDGET'
+            if heavy:
+                status += f" imports {', '.join(heavy)}"
+            failed = failed or bool(status)
+            print(f"{command:<16} {duration:>10.0f} {interpreter + budget:>10.0f} {len(modules):>8}  {status}")
+
+    sys.exit(1 if failed else 0)
+
+def createEnvironment(path):
+    with open(os.path.join(path, 'config.py'), 'w', encoding='utf-8') as file:
+        file.write(CONFIG.format(path=path))
+
+    # Created with the current schema, so the commands do not have to migrate them
+    gameDBPath = os.path.join(path, 'game.db')
+    migrateGameSchema(gameDBPath)
+    with transaction(gameDBPath) as c:
+        c.executemany('INSERT INTO game (id, startTime, league) VALUES (?, ?, ?)', [(str(index), 1727805600 + index * 86400 % (28 * 86400), 'H1') for index in range(200)])
+
+    migrateCalendarSchema(os.path.join(path, 'calendar.db'))
+    closeConnections()
+
+def measure(command, runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+def getImportedModules(bootstrap, command):
+    # -X importtime writes one line per imported module to stderr
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', bootstrap, command], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            modules.add(line.rsplit('|', 1)[1].strip())
+
+    # A package counts as imported if any of its submodules is
+    return modules | {'.'.join(module.split('.')[:depth]) for module in modules for depth in range(1, module.count('.') + 1)}
+
+if __name__ == "__main__":
+    main()
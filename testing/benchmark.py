@@ -0,0 +1,285 @@
+# Micro benchmarks for the hot paths of script.py on generated games, without Basketplan or Google
+# Every benchmark reports games per second and the peak memory of one run, measured with tracemalloc
+# Usage: python benchmark.py [--sizes 50,500,5000] [--iterations 5] [--only name,...] [--save-baseline] [--compare]
+# The baseline is stored in benchmark-baseline.json, --compare exits with 1 if a benchmark got slower or uses more memory
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import datetime
+import tempfile
+import tracemalloc
+import importlib.util
+
+# Add the parent directory to sys.path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+import script
+import googleclient
+import datecodec
+from gameparser import parseGameRows
+from fakecalendar import FakeCalendarService
+from storage import getConnection, transaction
+
+TESTINGPATH = os.path.dirname(os.path.abspath(__file__))
+BASELINEPATH = os.path.join(TESTINGPATH, 'benchmark-baseline.json')
+CLUB = {'clubId': '163', 'includeAll': True, 'combineLeagues': None}
+CLUBCALENDARID = 'club'
+# Share of the games which differ from their calendar event, so the update path is measured too
+CHANGEDSHARE = 0.1
+# Peak memory changes below this are noise of the allocator and not reported as regression
+MEMORYFLOORKIB = 64
+
+
+def main():
+    argumentParser = argparse.ArgumentParser(description="Benchmarks the hot paths of script.py on generated games")
+    argumentParser.add_argument('--sizes', default='50,500,5000', help="comma separated numbers of games")
+    argumentParser.add_argument('--iterations', type=int, default=5, help="timed runs per benchmark and size")
+    argumentParser.add_argument('--only', default=None, help="comma separated benchmark names")
+    argumentParser.add_argument('--baseline', default=BASELINEPATH, help="path of the baseline file")
+    argumentParser.add_argument('--save-baseline', action='store_true', help="store the results as new baseline")
+    argumentParser.add_argument('--compare', action='store_true', help="compare the results with the baseline")
+    argumentParser.add_argument('--tolerance', type=float, default=0.2, help="allowed regression, 0.2 is 20%%")
+    args = argumentParser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        argumentParser.error(f"Unknown benchmarks: {', '.join(unknown)}, available are {', '.join(BENCHMARKS)}")
+
+    fixtures = loadFixtureModule()
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tempPath:
+        # Keep the benchmark away from the configured databases and from Google
+        script.GAMEDBPATH = os.path.join(tempPath, 'game.db')
+        googleclient.CALENDARBACKEND = 'fake'
+        script.sendNotification = lambda title, message: None
+        googleclient.sendNotification = lambda title, message: None
+        script.logging.disable(script.logging.CRITICAL)
+
+        print(f"{'benchmark':<18} {'games':>6} {'ms/run':>10} {'games/s':>12} {'peak KiB':>10}")
+        for size in sizes:
+            data = createBenchmarkData(fixtures, size)
+            for name in names:
+                result = runBenchmark(BENCHMARKS[name], data, args.iterations)
+                results[f'{name}@{size}'] = result
+                print(f"{name:<18} {size:>6} {result['seconds'] * 1000:>10.2f} {result['opsPerSecond']:>12.0f} {result['peakKiB']:>10.0f}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+
+    if args.compare:
+        regressions = compareWithBaseline(results, args.baseline, args.tolerance)
+        sys.exit(1 if regressions else 0)
+
+def loadFixtureModule():
+    # The generator is a script with a dash in its name, so it is loaded from its path
+    spec = importlib.util.spec_from_file_location('generatefixtures', os.path.join(TESTINGPATH, 'generate-fixtures.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+#region Data
+
+def createBenchmarkData(fixtures, size):
+    rand = random.Random(size)
+    html = fixtures.createPage(size)
+    rows = parseGameRows(html)
+    leagues = sorted({row['league'] for row in rows})
+
+    games = []
+    for index, row in enumerate(rows):
+        start = datetime.datetime(2024, 9, 1, 10, 0) + datetime.timedelta(hours=index * 7)
+        games.append({
+            'id': row['id'],
+            'startTime': datecodec.toEpoch(datecodec.ZURICH.localize(start)),
+            'league': row['league'],
+            'homeTeam': row['homeTeam'],
+            'awayTeam': row['awayTeam'],
+            'gym': row['gym'],
+            'result': row['result'],
+            'teamCalendarId': row['league'],
+            'clubCalendarEventId': None,
+            'teamCalendarEventId': None,
+            'clubCalendarFingerprint': None,
+            'teamCalendarFingerprint': None,
+        })
+
+    # Every game already has its events, some of them are outdated
+    eventsByCalendar = {CLUBCALENDARID: []}
+    eventsByCalendar.update({league: [] for league in leagues})
+    for index, game in enumerate(games):
+        event = script.createEventBody(game)
+        fingerprint = script.createEventFingerprint(event)
+        if rand.random() < CHANGEDSHARE:
+            event['location'] = 'Alte Halle'
+
+        game['clubCalendarEventId'] = f'club{index:06d}'
+        game['teamCalendarEventId'] = f'team{index:06d}'
+        game['clubCalendarFingerprint'] = fingerprint
+        game['teamCalendarFingerprint'] = fingerprint
+        eventsByCalendar[CLUBCALENDARID].append(dict(event, id=game['clubCalendarEventId']))
+        eventsByCalendar[game['teamCalendarId']].append(dict(event, id=game['teamCalendarEventId']))
+
+    storedGames = [{key: game[key] for key in ('id', 'startTime', 'league', 'homeTeam', 'awayTeam', 'gym', 'result')} for game in games]
+
+    return {
+        'size': size,
+        'html': html,
+        'games': games,
+        'storedGames': storedGames,
+        'eventsByCalendar': eventsByCalendar,
+    }
+
+#endregion
+
+#region Runner
+
+def runBenchmark(benchmark, data, iterations):
+    setup, run = benchmark(data)
+
+    # One untimed run warms up caches and prepared statements
+    setup()
+    run()
+
+    durations = []
+    for _ in range(iterations):
+        setup()
+        start = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - start)
+
+    setup()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # The fastest run is the one least disturbed by the rest of the system
+    seconds = min(durations)
+    return {
+        'seconds': seconds,
+        'opsPerSecond': data['size'] / seconds if seconds > 0 else 0,
+        'peakKiB': peak / 1024,
+    }
+
+def compareWithBaseline(results, baselinePath, tolerance):
+    if not os.path.exists(baselinePath):
+        print(f"No baseline found at {baselinePath}, create it with --save-baseline")
+        return []
+
+    with open(baselinePath, encoding='utf-8') as file:
+        baseline = json.load(file)
+
+    regressions = []
+    print(f"\n{'benchmark':<25} {'games/s':>10} {'peak':>10}")
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+
+        speed = result['opsPerSecond'] / baseline[key]['opsPerSecond'] - 1
+        memory = result['peakKiB'] / baseline[key]['peakKiB'] - 1 if baseline[key]['peakKiB'] else 0
+        grownKiB = result['peakKiB'] - baseline[key]['peakKiB']
+        regressed = speed < -tolerance or (memory > tolerance and grownKiB > MEMORYFLOORKIB)
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<25} {speed:>+10.1%} {memory:>+10.1%}{'  REGRESSION' if regressed else ''}")
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmarks regressed by more than {tolerance:.0%}")
+    return regressions
+
+#endregion
+
+#region Benchmarks
+
+def noSetup():
+    pass
+
+
+def benchmarkParseRows(data):
+    return noSetup, lambda: parseGameRows(data['html'], script.PARSERBACKEND)
+
+def benchmarkParseClubGames(data):
+    return noSetup, lambda: script.parseClubGames(CLUB, data['html'])
+
+def benchmarkCompareGame(data):
+    events = {event['id']: event for event in data['eventsByCalendar'][CLUBCALENDARID]}
+    pairs = [(game, events[game['clubCalendarEventId']]) for game in data['games']]
+
+    def run():
+        for game, event in pairs:
+            script.compareGame(game, event)
+
+    return noSetup, run
+
+def benchmarkEventBody(data):
+    # The per game work of bulkUpdateEvents before anything is sent
+    def run():
+        for game in data['games']:
+            script.createEventFingerprint(script.createEventBody(game))
+
+    return noSetup, run
+
+def benchmarkBulkUpdateEvents(data):
+    # Event bodies, batching and the event id writes, against the fake calendar without latency
+    service = FakeCalendarService()
+    calendarId = service.insertCalendar({'summary': 'Benchmark', 'timeZone': 'Europe/Zurich'})['id']
+    games = [dict(game, clubCalendarEventId=None) for game in data['games']]
+
+    def setup():
+        service.state['calendars'][calendarId]['events'] = {}
+        googleclient.googleService = service
+        createGameRows(data)
+
+    return setup, lambda: script.bulkUpdateEvents(games, 'create', calendarId)
+
+def benchmarkReconcileGames(data):
+    return noSetup, lambda: script.reconcileGames(data['games'], data['eventsByCalendar'], CLUBCALENDARID)
+
+def benchmarkUpsertInsert(data):
+    def setup():
+        script.migrateGameDB()
+        getConnection(script.GAMEDBPATH).execute('DELETE FROM game')
+
+    return setup, lambda: upsertGames(data['storedGames'])
+
+def benchmarkUpsertUnchanged(data):
+    return (lambda: createGameRows(data)), lambda: upsertGames(data['storedGames'])
+
+def benchmarkFlushEventIds(data):
+    eventIdUpdates = [{'gameId': game['id'], 'eventId': game['teamCalendarEventId'], 'fingerprint': game['teamCalendarFingerprint']} for game in data['games']]
+    return (lambda: createGameRows(data)), lambda: script.flushEventIds('teamCalendarEventId', eventIdUpdates)
+
+def createGameRows(data):
+    script.migrateGameDB()
+    getConnection(script.GAMEDBPATH).execute('DELETE FROM game')
+    upsertGames(data['storedGames'])
+
+def upsertGames(gamesList):
+    with transaction(script.GAMEDBPATH) as c:
+        return script.upsertGames(c, gamesList)
+
+#endregion
+
+BENCHMARKS = {
+    'parseRows': benchmarkParseRows,
+    'parseClubGames': benchmarkParseClubGames,
+    'compareGame': benchmarkCompareGame,
+    'eventBody': benchmarkEventBody,
+    'bulkUpdateEvents': benchmarkBulkUpdateEvents,
+    'reconcileGames': benchmarkReconcileGames,
+    'upsertInsert': benchmarkUpsertInsert,
+    'upsertUnchanged': benchmarkUpsertUnchanged,
+    'flushEventIds': benchmarkFlushEventIds,
+}
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Runs the tests with a generated config.py in a temporary directory, the fake calendar backend and without Gotify,
+# so they never touch the configured databases, Basketplan or Google
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+PACKAGEPATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TESTINGPATH = os.path.dirname(os.path.abspath(__file__))
+DATAPATH = tempfile.mkdtemp(prefix='gameplan-tests-')
+
+CONFIG = '''import logging
+DEBUG = False
+LOGLEVEL = logging.INFO
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
+LOGPATH = {path!r} + '/log'
+GAMEDBPATH = {path!r} + '/game.db'
+CALENDARDBPATH = {path!r} + '/calendar.db'
+PROBASKETCLUBS = [{{'clubId': '163', 'includeAll': True, 'combineLeagues': None}}]
+CLUBNAME = 'Test Club'
+CLUBNAMESHORT = 'TC'
+CLUBGAMESURL = 'http://localhost/'
+GOTIFYURL = None
+GOTIFYTOKEN = None
+SERVICEACCOUNTFILE = None
+PERSONALEMAIL = None
+CALENDARBACKEND = 'fake'
+'''
+
+with open(os.path.join(DATAPATH, 'config.py'), 'w', encoding='utf-8') as file:
+    file.write(CONFIG.format(path=DATAPATH))
+# Before the package, so a config.py next to the script is never used
+sys.path[:0] = [DATAPATH, PACKAGEPATH]
+
+
+def pytest_unconfigure():
+    shutil.rmtree(DATAPATH, ignore_errors=True)
+
+def loadFixtureModule():
+    spec = importlib.util.spec_from_file_location('generatefixtures', os.path.join(TESTINGPATH, 'generate-fixtures.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class FakeResponse:
+
+    def __init__(self, text):
+        self.status_code = 200
+        self.headers = {}
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.request = FakeRequest()
+
+class FakeRequest:
+    body = ''
+
+class FakeBasketplan:
+    # Answers every search with the same generated page, the date range of the request is ignored
+
+    def __init__(self, size):
+        self.page = loadFixtureModule().createPage(size)
+        self.requestCount = 0
+
+    def post(self, url, **kwargs):
+        self.requestCount += 1
+        return FakeResponse(self.page)
+
+@pytest.fixture
+def sync(monkeypatch):
+    # Empty databases and fake calendar, the notifications are collected instead of sent
+    import googleclient
+    import script
+    import storage
+
+    storage.closeConnections()
+    for name in os.listdir(DATAPATH):
+        if name != 'config.py':
+            path = os.path.join(DATAPATH, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+    os.makedirs(os.path.join(DATAPATH, 'log'))
+
+    notifications = []
+    monkeypatch.setattr(script, 'sendNotification', lambda title, message: notifications.append((title, message)))
+    monkeypatch.setattr(googleclient, 'sendNotification', lambda title, message: notifications.append((title, message)))
+    monkeypatch.setattr(googleclient, 'googleService', None)
+    monkeypatch.setattr(script, 'httpSession', FakeBasketplan(30))
+    monkeypatch.setattr(script, 'BACKOFFBASE', 0)
+
+    yield SyncRun(script, notifications)
+
+    storage.closeConnections()
+
+class SyncRun:
+
+    def __init__(self, script, notifications):
+        self.script = script
+        self.notifications = notifications
+
+    def run(self):
+        # Returns the counts of the summary notification of the run
+        self.notifications.clear()
+        self.script.runSync(self.script.PROBASKETCLUBS)
+        summary = next(message for title, message in self.notifications if title.endswith('Gameplan Update'))
+        return dict((key, int(value)) for key, value in (line.split(': ') for line in summary.splitlines() if line))
+
+    def service(self):
+        import googleclient
+        return googleclient.getGoogleService()
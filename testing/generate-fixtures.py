@@ -0,0 +1,102 @@
+# Generates Basketplan-like "showSearchGames.do" pages to parse and benchmark offline
+import sys
+import os
+import random
+import datetime
+
+FIXTUREPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+WEEKDAYS = ['Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So']
+LEAGUES = ['NLA', 'NLB', '1LN', 'D2LA', 'H2LA', 'U20M', 'U18M', 'U16M', 'U16F', 'U14M', 'U14F', 'U12Mix']
+GYMS = ['Sporthalle Rex', 'Turnhalle Erlen', 'Kantonsschule Halle 2', 'Mehrzweckhalle Gersag', 'Sportzentrum Zug']
+TEAMS = ['BC Emmenbrücke', 'Swiss Central Basket', 'BC Luzern', 'STV Luzern', 'BC Zug', 'Olten Zofingen', 'BC Bären Kleinbasel', 'Pully Lausanne Foxes']
+
+PAGEHEAD = '''<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.01 Transitional//EN">
+<html>
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=UTF-8">
+<title>Basketplan - Spiele suchen</title>
+<link rel="stylesheet" type="text/css" href="/css/basketplan.css">
+<script type="text/javascript" src="/js/basketplan.js"></script>
+<script type="text/javascript">
+function showGame(id) { window.location = '/findGameById.do?gameId=' + id; }
+</script>
+</head>
+<body>
+<div id="header"><a href="/"><img src="/images/logo.gif" alt="Basketplan"></a></div>
+<div id="menu">
+<table class="menu">
+<tr><td><a href="/showSearchGames.do">Spiele</a></td><td><a href="/showLeagues.do">Ligen</a></td><td><a href="/showClubs.do">Vereine</a></td></tr>
+</table>
+</div>
+<div id="body">
+<form name="searchGamesForm" method="post" action="/showSearchGames.do">
+<table class="search">
+<tr><td>Von</td><td><input type="text" name="from" value="01.07.24"></td><td>Bis</td><td><input type="text" name="to" value=""></td></tr>
+</table>
+</form>
+<table class="forms" cellspacing="0" cellpadding="2">
+<tr><td class="title" colspan="12">Spiele</td></tr>
+<tr>
+<td class="header">Datum</td><td class="header">Runde</td><td class="header">Verband</td><td class="header">Liga</td>
+<td class="header">Phase</td><td class="header">Nr.</td><td class="header">Halle</td><td class="header">Heim</td>
+<td class="header">Gast</td><td class="header">Schiedsrichter</td><td class="header">Status</td><td class="header">Resultat</td>
+</tr>
+'''
+
+PAGEFOOT = '''</table>
+</div>
+<div id="footer">&copy; Swiss Basketball</div>
+</body>
+</html>
+'''
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or [50, 500]
+    if not os.path.exists(FIXTUREPATH):
+        os.makedirs(FIXTUREPATH)
+
+    for size in sizes:
+        path = os.path.join(FIXTUREPATH, f'games-{size}.html')
+        with open(path, 'w', encoding='utf-8', newline='\n') as file:
+            file.write(createPage(size))
+        print(f"Written {path}")
+
+def createPage(size, seed=163):
+    rand = random.Random(seed)
+    start = datetime.datetime(2024, 9, 1, 10, 0)
+    rows = [PAGEHEAD]
+
+    for index in range(size):
+        gameDate = start + datetime.timedelta(days=index * 180 // max(size, 1), hours=rand.choice([0, 2, 4, 7, 9]))
+        homeTeam, awayTeam = rand.sample(TEAMS, 2)
+        gameId = str(24000 + index * 7)
+        played = gameDate < datetime.datetime(2024, 11, 1)
+
+        # Some games are not scheduled yet and have no date
+        date = '' if rand.random() < 0.03 else f"{WEEKDAYS[gameDate.weekday()]} {gameDate.strftime('%d.%m.%y %H:%M')}"
+        result = f"{rand.randint(40, 110)}&nbsp;:&nbsp;{rand.randint(40, 110)}" if played else '&nbsp;'
+        rowClass = 'even' if index % 2 == 0 else 'odd'
+
+        rows.append(
+            f'<tr class="{rowClass}">\n'
+            f'<td nowrap>{date}</td>\n'
+            f'<td>{index // 8 + 1}</td>\n'
+            f'<td>SB</td>\n'
+            f'<td><a href="/showLeague.do?leagueId={index % 12}">{rand.choice(LEAGUES)}</a></td>\n'
+            f'<td>Qualifikation</td>\n'
+            f'<td><a href="javascript:showGame({gameId})">{gameId}</a></td>\n'
+            f'<td><a href="/showGym.do?gymId={index % 5}">{rand.choice(GYMS)}</a></td>\n'
+            f'<td><a href="/showTeam.do?teamId={index}">{homeTeam}</a></td>\n'
+            f'<td><a href="/showTeam.do?teamId={index + 1}">{awayTeam}</a></td>\n'
+            f'<td>Muster&nbsp;/&nbsp;Beispiel</td>\n'
+            f'<td>{"gespielt" if played else "geplant"}</td>\n'
+            f'<td nowrap> {result} </td>\n'
+            '</tr>\n'
+        )
+
+    rows.append(PAGEFOOT)
+    return ''.join(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+from fakecalendar import createHttpError
+
+
+def failFirstCalls(service, monkeypatch, errors):
+    # The next calls to the fake calendar fail with the given errors, in order
+    errors = list(errors)
+    monkeypatch.setattr(service, 'injectError', lambda: createHttpError(*errors.pop(0), "Test error") if errors else None)
+
+def createInsertRequests(service, calendarId, count):
+    events = service.events()
+    return [(f'request{index}', events.insert(calendarId=calendarId, body={'summary': f'Event {index}'})) for index in range(count)]
+
+def test_retried_request_succeeds_on_second_attempt(sync, monkeypatch):
+    service = sync.service()
+    calendarId = service.calendars().insert(body={'summary': 'Test'}).execute()['id']
+    failFirstCalls(service, monkeypatch, [(503, 'backendError')])
+
+    outcomes = sync.script.executeBatches(createInsertRequests(service, calendarId, 3))
+
+    assert {request_id: outcome['attempts'] for request_id, outcome in outcomes.items()} == {'request0': 2, 'request1': 1, 'request2': 1}
+    assert all(outcome['exception'] is None for outcome in outcomes.values())
+    assert len(service.events().list(calendarId=calendarId).execute()['items']) == 3
+
+def test_rate_limited_request_is_retried(sync, monkeypatch):
+    service = sync.service()
+    calendarId = service.calendars().insert(body={'summary': 'Test'}).execute()['id']
+    failFirstCalls(service, monkeypatch, [(403, 'rateLimitExceeded'), (403, 'rateLimitExceeded')])
+
+    outcomes = sync.script.executeBatches(createInsertRequests(service, calendarId, 1))
+
+    assert outcomes['request0']['attempts'] == 3
+    assert outcomes['request0']['exception'] is None
+
+def test_permanent_error_is_not_retried(sync, monkeypatch):
+    service = sync.service()
+    calendarId = service.calendars().insert(body={'summary': 'Test'}).execute()['id']
+    failFirstCalls(service, monkeypatch, [(404, 'notFound')])
+
+    outcomes = sync.script.executeBatches(createInsertRequests(service, calendarId, 2))
+
+    assert outcomes['request0']['attempts'] == 1
+    assert outcomes['request0']['error']['status'] == 404
+    assert outcomes['request1']['exception'] is None
+
+def test_request_fails_after_the_last_attempt(sync, monkeypatch):
+    service = sync.service()
+    calendarId = service.calendars().insert(body={'summary': 'Test'}).execute()['id']
+    monkeypatch.setattr(sync.script, 'BATCHATTEMPTS', 3)
+    failFirstCalls(service, monkeypatch, [(503, 'backendError')] * 3)
+
+    outcomes = sync.script.executeBatches(createInsertRequests(service, calendarId, 1))
+
+    assert outcomes['request0']['attempts'] == 3
+    assert outcomes['request0']['error']['status'] == 503
+    assert outcomes['request0']['error']['reason'] == 'backendError'
@@ -0,0 +1,45 @@
+import datetime
+
+import pytest
+
+from datecodec import ZURICH, formatBasketplanDate, fromEpoch, parseBasketplanDate, parseIsoDate, toEpoch
+
+
+# Summer time ends on 27.10.24 and starts on 30.03.25 in Zurich
+@pytest.mark.parametrize('text, utcOffsetHours', [
+    ('Sa 26.10.24 20:00', 2),
+    ('So 27.10.24 01:30', 2),
+    ('So 27.10.24 03:30', 1),
+    ('So 27.10.24 20:00', 1),
+    ('Sa 29.03.25 20:00', 1),
+    ('So 30.03.25 01:30', 1),
+    ('So 30.03.25 03:30', 2),
+    ('So 30.03.25 20:00', 2),
+])
+def test_epoch_round_trip_keeps_the_local_time(text, utcOffsetHours):
+    date = parseBasketplanDate(text)
+    assert date.utcoffset() == datetime.timedelta(hours=utcOffsetHours)
+
+    roundTrip = fromEpoch(toEpoch(date))
+    assert roundTrip == date
+    assert roundTrip.utcoffset() == date.utcoffset()
+    assert roundTrip.strftime('%d.%m.%y %H:%M') == text[3:]
+    assert formatBasketplanDate(roundTrip) == text[3:11]
+
+def test_time_between_games_counts_the_repeated_hour():
+    before = parseBasketplanDate('So 27.10.24 01:00')
+    after = parseBasketplanDate('So 27.10.24 04:00')
+    # Three hours on the clock, but the hour from 02:00 to 03:00 happens twice
+    assert toEpoch(after) - toEpoch(before) == 4 * 3600
+
+def test_iso_round_trip():
+    date = parseBasketplanDate('Sa 26.10.24 20:00')
+    assert parseIsoDate(date.isoformat()) == date
+    assert parseIsoDate('2024-10-26T18:00:00Z') == date
+    assert fromEpoch(toEpoch(parseIsoDate('2024-10-27T19:00:00Z'))) == ZURICH.localize(datetime.datetime(2024, 10, 27, 20, 0))
+
+def test_weekday_is_optional_and_empty_text_has_no_date():
+    assert parseBasketplanDate('26.10.24 20:00') == parseBasketplanDate('Sa 26.10.24 20:00')
+    assert parseBasketplanDate('  ') is None
+    with pytest.raises(ValueError):
+        parseBasketplanDate('26.10.2024 20:00')
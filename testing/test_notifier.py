@@ -0,0 +1,60 @@
+import queue
+import threading
+from collections import deque
+
+import pytest
+
+import notifier
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    # A fresh notifier that collects what it would send
+    sent = []
+    monkeypatch.setattr(notifier, 'send', lambda title, message: sent.append((title, message)))
+    monkeypatch.setattr(notifier, 'window', 0.2)
+    monkeypatch.setattr(notifier, 'perMinute', 100)
+    monkeypatch.setattr(notifier, 'queueSize', 100)
+    monkeypatch.setattr(notifier, 'worker', None)
+    monkeypatch.setattr(notifier, 'pending', None)
+    monkeypatch.setattr(notifier, 'stopRequested', threading.Event())
+    monkeypatch.setattr(notifier, 'droppedCount', 0)
+    monkeypatch.setattr(notifier, 'lastSent', {})
+    monkeypatch.setattr(notifier, 'heldBack', {})
+    monkeypatch.setattr(notifier, 'sendTimes', deque())
+    yield sent
+    notifier.flush()
+
+def test_notifications_are_merged_per_title(sent):
+    for message in ['timeout', 'timeout', 'not found', 'timeout']:
+        notifier.notify('TC: Gameplan Error', message)
+    notifier.notify('TC: Gameplan Update', 'Created: 3')
+    notifier.flush()
+
+    assert sent == [
+        ('TC: Gameplan Error', "timeout\n(3 times)\n\nnot found"),
+        ('TC: Gameplan Update', 'Created: 3'),
+    ]
+
+def test_repeated_message_is_held_back_and_reported_once(sent, monkeypatch):
+    notifier.sendDigests([('TC: Gameplan Error', 'timeout')])
+    notifier.sendDigests([('TC: Gameplan Error', 'timeout'), ('TC: Gameplan Error', 'timeout')])
+    assert sent == [('TC: Gameplan Error', 'timeout')]
+
+    # Once the repeat window is over, the held back repeats are sent with the next digest
+    monkeypatch.setattr(notifier, 'dedupWindow', -1)
+    notifier.sendDigests([('TC: Gameplan Error', 'not found')])
+    assert sent[1:] == [('TC: Gameplan Error', "timeout\n(2 times)\n\nnot found")]
+
+def test_full_queue_drops_and_counts(sent, monkeypatch):
+    # No worker reads the queue, so it fills up
+    monkeypatch.setattr(notifier, 'pending', queue.Queue(maxsize=2))
+    monkeypatch.setattr(notifier, 'worker', object())
+    for message in ['first', 'second', 'third', 'fourth']:
+        notifier.notify('TC: Gameplan Error', message)
+    assert notifier.droppedCount == 2
+
+    notifier.sendDigests([notifier.pending.get_nowait(), notifier.pending.get_nowait()])
+    assert sent == [('TC: Gameplan Error', "first\n\nsecond\n\n2 notifications were dropped, the queue was full")]
+    assert notifier.droppedCount == 0
+    notifier.worker = None
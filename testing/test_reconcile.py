@@ -0,0 +1,58 @@
+import pytest
+
+
+@pytest.fixture
+def driftCheck(sync, monkeypatch):
+    # Every run reads the events from the fake calendar
+    monkeypatch.setattr(sync.script, 'DRIFTCHECKINTERVAL', 0)
+    return sync
+
+def loadEventIds(script, gameId):
+    game = next(game for game in script.loadGames() if game['id'] == gameId)
+    return {
+        'clubCalendarId': getClubCalendarId(script),
+        'clubCalendarEventId': game['clubCalendarEventId'],
+        'teamCalendarId': game['teamCalendarId'],
+        'teamCalendarEventId': game['teamCalendarEventId'],
+    }
+
+def getClubCalendarId(script):
+    return next(calendar['googleCalendarId'] for calendar in script.loadCalendars() if calendar['isClubCalendar'])
+
+def test_missing_event_is_created_again(sync):
+    game = {
+        'id': '24000', 'startTime': 1727805600, 'league': 'NLA', 'homeTeam': 'A', 'awayTeam': 'B', 'gym': 'Halle',
+        'teamCalendarId': 'team', 'clubCalendarEventId': 'deleted', 'teamCalendarEventId': None,
+        'clubCalendarFingerprint': None, 'teamCalendarFingerprint': None,
+    }
+
+    reconciliation = sync.script.reconcileGames([game], {'club': []}, 'club')
+
+    assert reconciliation['club']['create'] == [game]
+    assert reconciliation['missing'] == [('club', game)]
+
+def test_drift_check_recreates_deleted_events(driftCheck):
+    script = driftCheck.script
+    firstRun = driftCheck.run()
+    assert firstRun['Created Club-Calendar Events'] > 0
+
+    gameId = next(game['id'] for game in script.loadGames() if game['clubCalendarEventId'] and game['teamCalendarEventId'])
+    deleted = loadEventIds(script, gameId)
+    events = driftCheck.service().events()
+    events.delete(calendarId=deleted['clubCalendarId'], eventId=deleted['clubCalendarEventId']).execute()
+    events.delete(calendarId=deleted['teamCalendarId'], eventId=deleted['teamCalendarEventId']).execute()
+
+    secondRun = driftCheck.run()
+    assert secondRun['Events not found in Calendars'] == 2
+    assert secondRun['Created Club-Calendar Events'] == 1
+    assert secondRun['Created Team-Calendar Events'] == 1
+
+    created = loadEventIds(script, gameId)
+    assert created['clubCalendarEventId'] != deleted['clubCalendarEventId']
+    assert events.get(calendarId=created['clubCalendarId'], eventId=created['clubCalendarEventId']).execute()['status'] != 'cancelled'
+    assert events.get(calendarId=created['teamCalendarId'], eventId=created['teamCalendarEventId']).execute()['status'] != 'cancelled'
+
+    thirdRun = driftCheck.run()
+    assert thirdRun['Events not found in Calendars'] == 0
+    assert thirdRun['Created Club-Calendar Events'] == 0
+    assert thirdRun['Created Team-Calendar Events'] == 0
@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+
+import storage
+from datecodec import parseBasketplanDate, toEpoch
+from schema import CALENDARMIGRATIONS, GAMEMIGRATIONS, getSchemaVersion, migrateCalendarSchema, migrateGameSchema
+
+
+@pytest.fixture
+def databasePath(tmp_path):
+    yield str(tmp_path / 'test.db')
+    storage.closeConnections()
+
+def createBaseline(path, statements):
+    # Written with a plain connection, as the versions before the schema versioning did
+    conn = sqlite3.connect(path)
+    for statement in statements:
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
+
+def loadColumns(path, table):
+    return [column['name'] for column in storage.getConnection(path).execute(f'PRAGMA table_info({table})')]
+
+def test_game_baseline_is_migrated_to_epoch_start_times(databasePath):
+    startTime = parseBasketplanDate('So 27.10.24 20:00')
+    createBaseline(databasePath, [
+        '''
+        CREATE TABLE game (
+            id text PRIMARY KEY,
+            date DATETIME NULL,
+            league text,
+            homeTeam text,
+            awayTeam text,
+            gym text,
+            result text,
+            clubCalendarEventId text NULL,
+            teamCalendarEventId text NULL,
+            teamCalendarId text,
+            FOREIGN KEY (teamCalendarId) REFERENCES calendar(id)
+        )
+        ''',
+        f"INSERT INTO game (id, date, league, clubCalendarEventId) VALUES ('1', '{startTime}', 'NLA', 'event1')",
+        "INSERT INTO game (id, date, league) VALUES ('2', NULL, 'NLB')",
+    ])
+
+    assert migrateGameSchema(databasePath) == GAMEMIGRATIONS[-1][0]
+
+    conn = storage.getConnection(databasePath)
+    assert getSchemaVersion(conn) == GAMEMIGRATIONS[-1][0]
+    games = {game['id']: dict(game) for game in conn.execute('SELECT * FROM game')}
+    assert games['1']['startTime'] == toEpoch(startTime)
+    assert games['1']['clubCalendarEventId'] == 'event1'
+    assert games['1']['clubCalendarFingerprint'] is None
+    assert games['2']['startTime'] is None
+    assert 'date' not in loadColumns(databasePath, 'game')
+    assert {'fullFetchedAt', 'gameCount', 'gameDates'} <= set(loadColumns(databasePath, 'fetchCache'))
+
+def test_game_migration_runs_only_once(databasePath):
+    migrateGameSchema(databasePath)
+    with storage.transaction(databasePath) as c:
+        c.execute("INSERT INTO game (id, startTime, league) VALUES ('1', 1730055600, 'NLA')")
+
+    assert migrateGameSchema(databasePath) == GAMEMIGRATIONS[-1][0]
+    assert storage.getConnection(databasePath).execute('SELECT startTime FROM game').fetchone()[0] == 1730055600
+
+def test_calendar_baseline_gets_new_columns_and_indexes(databasePath):
+    createBaseline(databasePath, [
+        '''
+        CREATE TABLE calendar (
+            id text PRIMARY KEY,
+            googleCalendarId text,
+            league text NULL,
+            isClubCalendar boolean,
+            isShared boolean DEFAULT 0
+        )
+        ''',
+        "INSERT INTO calendar (id, googleCalendarId, league, isClubCalendar) VALUES ('1', 'google1', 'NLA', 0)",
+    ])
+
+    assert migrateCalendarSchema(databasePath) == CALENDARMIGRATIONS[-1][0]
+
+    conn = storage.getConnection(databasePath)
+    assert {'syncToken', 'lastEventCheck'} <= set(loadColumns(databasePath, 'calendar'))
+    assert conn.execute('SELECT googleCalendarId FROM calendar').fetchone()[0] == 'google1'
+    indexes = [index['name'] for index in conn.execute('PRAGMA index_list(calendar)')]
+    assert 'calendarLeague' in indexes
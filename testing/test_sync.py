@@ -0,0 +1,42 @@
+import importlib
+
+
+def countEvents(service):
+    calendars = service.calendarList().list().execute()['items']
+    return sum(len(service.events().list(calendarId=calendar['id']).execute()['items']) for calendar in calendars)
+
+def test_second_sync_leaves_the_events_unchanged(sync):
+    firstRun = sync.run()
+    createdEvents = firstRun['Created Club-Calendar Events'] + firstRun['Created Team-Calendar Events']
+    # Games without a date get no event
+    datedGames = [game for game in sync.script.loadGames() if game['startTime'] is not None]
+    assert firstRun['Inserted Games'] == 30
+    assert firstRun['Created Club-Calendar Events'] == len(datedGames)
+    assert firstRun['Created Club-Calendar Events'] == firstRun['Created Team-Calendar Events']
+    assert firstRun['Failed Calendar Requests'] == 0
+    assert countEvents(sync.service()) == createdEvents
+
+    secondRun = sync.run()
+    assert secondRun['Inserted Games'] == 0
+    assert secondRun['Created Club-Calendar Events'] == 0
+    assert secondRun['Created Team-Calendar Events'] == 0
+    assert secondRun['Updated Club-Calendar Events'] == 0
+    assert secondRun['Updated Team-Calendar Events'] == 0
+    # The club count includes the games without a date
+    assert secondRun['Unchanged Club-Calendar Events'] == 30
+    assert secondRun['Unchanged Team-Calendar Events'] == firstRun['Created Team-Calendar Events']
+
+def test_fake_calendar_is_kept_across_a_reload(sync, monkeypatch):
+    import googleclient
+
+    firstRun = sync.run()
+    createdEvents = firstRun['Created Club-Calendar Events'] + firstRun['Created Team-Calendar Events']
+
+    # As the daemon does when config.py changed
+    importlib.reload(googleclient)
+    monkeypatch.setattr(googleclient, 'sendNotification', sync.script.sendNotification)
+    assert countEvents(googleclient.getGoogleService()) == createdEvents
+
+    secondRun = sync.run()
+    assert secondRun['Created Club-Calendar Events'] == 0
+    assert countEvents(googleclient.getGoogleService()) == createdEvents
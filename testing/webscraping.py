@@ -1,5 +1,12 @@
+import sys
+import os
 import requests
-from bs4 import BeautifulSoup
+
+# Add the parent directory to sys.path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+from gameparser import parseGameRows
 
 # Define the URL to send the POST request to
 url = 'https://basketplan.ch/showSearchGames.do'
@@ -18,29 +25,10 @@ response = requests.post(url, data=data)
 
 # Check if the request was successful
 if response.status_code == 200:
-    # Parse the HTML response
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Find the table with the game data
-    table = soup.select_one('#body table.forms')
-    
-    # Extract specific game data from the table rows, skipping the first two rows
-    games = []
-    rows = table.find_all('tr')[2:]  # Skip the first two rows
-    for row in rows:
-        cells = row.find_all('td')
-        game_data = {
-            'date': cells[0].text.strip(),
-            'league': cells[3].text.strip(),
-            'gameId': cells[5].text.strip(),
-            'gym': cells[6].text.strip(),
-            'homeTeam': cells[7].text.strip(),
-            'awayTeam': cells[8].text.strip(),
-            'score': cells[11].text.strip(),
-        }
-        games.append(game_data)
-    
+    # Extract the game data from the game table, the header rows are skipped by the parser
+    games = parseGameRows(response.text)
+
     # Print the extracted game data
     print(games)
 else:
-    print(f"Failed to retrieve data. Status code: {response.status_code}")
\ No newline at end of file
+    print(f"Failed to retrieve data. Status code: {response.status_code}")